@@ -50,6 +50,17 @@ pub fn build(b: *std.Build) void {
     const run_step = b.step("run", "Run the app");
     run_step.dependOn(&run_cmd.step);
 
+    // The single day runner that src/parity.py compares the Python days
+    // against: `zig build parity -Doptimize=ReleaseFast`
+    const parity = b.addExecutable(.{
+        .name = "parity",
+        .root_source_file = b.path("src/parity.zig"),
+        .target = target,
+        .optimize = optimize,
+    });
+    const parity_step = b.step("parity", "Build the parity harness runner");
+    parity_step.dependOn(&b.addInstallArtifact(parity, .{}).step);
+
     const exe_unit_tests = b.addTest(.{
         .root_source_file = b.path("src/tests.zig"),
         .target = target,
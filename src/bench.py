@@ -0,0 +1,305 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Callable
+
+from generate import generate
+from inputs import Input
+from main import load_day
+
+BASELINE = "bench_baseline.json"
+
+
+@dataclass
+class Case:
+    """
+    A solver function timed at several input scales. setup(scale) builds
+    the arguments for one call and isn't timed; it's called again before
+    every repetition since some solvers change their input in place.
+    """
+
+    name: str
+    func: Callable
+    setup: Callable
+    scales: tuple
+
+
+@cache
+def generated(day, size, **options):
+    return "".join(generate(day, size, seed=0, **options)).encode()
+
+
+def parsed(day, size, **options):
+    return load_day(day).load(Input(generated(day, size, **options)))
+
+
+def cases():
+    d04, d05, d08, d09, d10, d11, d12, d16, d18, d19, d20, d22, d23, d24, d25 = (
+        load_day(n) for n in (4, 5, 8, 9, 10, 11, 12, 16, 18, 19, 20, 22, 23, 24, 25)
+    )
+
+    found = [
+        Case("day04.count", d04.count, lambda n: (parsed(4, n),), (50, 100, 200)),
+        Case(
+            "day04.count_crossing_mas",
+            d04.count_crossing_mas,
+            lambda n: (parsed(4, n),),
+            (50, 100, 200),
+        ),
+        Case("day05.solve", d05.solve, lambda n: (parsed(5, n),), (1000, 10000)),
+        Case(
+            "day08.solve[part_two]",
+            lambda lines: d08.solve(lines, part_two=True),
+            lambda n: (parsed(8, n),),
+            (50, 100, 200),
+        ),
+        Case(
+            "day09.fragment", d09.fragment, lambda n: (parsed(9, n),), (20000, 200000)
+        ),
+        Case(
+            "day09.fragment[part_two]",
+            lambda s: d09.fragment(s, True),
+            lambda n: (parsed(9, n),),
+            (2000, 20000),
+        ),
+        Case(
+            "day10.count_trailheads[part_two]",
+            lambda grid: d10.count_trailheads(grid, part_two=True),
+            lambda n: (parsed(10, n),),
+            (80, 400, 2000),
+        ),
+        Case(
+            "day11.num_stones_after",
+            d11.num_stones_after,
+            lambda n: ([125, 17], n),
+            (25, 75, 500),
+        ),
+        Case(
+            "day12.calc_price[part_two]",
+            lambda lines: d12.part_two(lines),
+            lambda n: (parsed(12, n),),
+            (50, 100, 200),
+        ),
+        Case(
+            "day16.find_paths",
+            d16.find_paths,
+            lambda n: parsed(16, n),
+            (21, 41, 81),
+        ),
+        Case(
+            "day18.shortest_path",
+            lambda ps: ps.shortest_path(),
+            lambda n: (dropped(d18, n),),
+            (71, 141, 281),
+        ),
+        Case(
+            "day19.find_combos_dp[towels]",
+            lambda towels, patterns: d19.count_combinations(patterns, towels),
+            lambda n: parsed(19, 20, towels=n),
+            (1000, 10000),
+        ),
+        Case(
+            "day20.find_savings[radius]",
+            lambda data, radius: d20.find_savings(*data, max_distance=radius),
+            lambda n: (parsed(20, 41), n),
+            (2, 20, 50),
+        ),
+        Case("day22.part_two", d22.part_two, lambda n: (parsed(22, n),), (100, 400)),
+        Case(
+            "day23.largest_clique",
+            d23.largest_clique,
+            lambda n: (parsed(23, n),),
+            (100, 1000, 10000),
+        ),
+        Case(
+            "day24.loop",
+            lambda states, gates: d24.loop(gates, states),
+            lambda n: parsed(24, n),
+            (45, 200, 1000),
+        ),
+        Case("day25.part_one", d25.part_one, lambda n: (parsed(25, n),), (500, 2000)),
+    ]
+    found.append(
+        Case(
+            "day04.count_words[words]",
+            lambda grid, words: d04.count_words(grid, words),
+            lambda n: (parsed(4, 200), dictionary(n)),
+            (10, 100, 1000),
+        )
+    )
+    if d04.np is not None:
+        found.append(
+            Case(
+                "day04.count_vectorized",
+                d04.count_vectorized,
+                lambda n: (parsed(4, n),),
+                (200, 1000, 2000),
+            )
+        )
+    if d08.np is not None:
+        found.append(
+            Case(
+                "day08.antinode_mask[part_two]",
+                lambda grid: d08.antinode_mask(grid, part_two=True),
+                lambda n: (parsed(8, n),),
+                (50, 200, 1000),
+            )
+        )
+    return found
+
+
+def dictionary(n):
+    rng = random.Random(n)
+    return ["".join(rng.choices("XMAS", k=rng.randint(3, 8))) for _ in range(n)]
+
+
+def dropped(d18, n):
+    falling_bytes = parsed(18, n)
+    ps = d18.ProgramSpace(n, falling_bytes)
+    ps.drop(len(falling_bytes) // 4)
+    return ps
+
+
+def time_case(case, repeat=3, max_seconds=1.0):
+    """
+    Return the best of `repeat` timings at each scale. Calls that take
+    longer than max_seconds aren't repeated.
+    """
+    timings = {}
+    for scale in case.scales:
+        best = math.inf
+        for _ in range(repeat):
+            args = case.setup(scale)
+            start = time.perf_counter()
+            case.func(*args)
+            best = min(best, time.perf_counter() - start)
+            if best > max_seconds:
+                break
+        timings[str(scale)] = best
+    return timings
+
+
+def slopes(timings):
+    """
+    The log-log slope between consecutive scales, i.e. the exponent k of
+    the O(n^k) growth that the measurements suggest.
+    """
+    points = [(int(s), t) for s, t in timings.items()]
+    return [
+        math.log(t2 / t1) / math.log(s2 / s1)
+        for (s1, t1), (s2, t2) in zip(points, points[1:])
+        if t1 > 0 and t2 > 0
+    ]
+
+
+def compare(timings, baseline, threshold):
+    """
+    Return the scales whose time is more than `threshold` (a fraction)
+    slower than the baseline, along with the relative change.
+    """
+    regressions = []
+    for scale, t in timings.items():
+        if scale in baseline and t > baseline[scale] * (1 + threshold):
+            regressions.append((scale, t / baseline[scale] - 1))
+    return regressions
+
+
+def load_baseline(path):
+    if not Path(path).exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)["cases"]
+
+
+def save_baseline(path, results):
+    cases = load_baseline(path)
+    cases.update(results)
+    with open(path, "w") as f:
+        json.dump({"python": platform.python_version(), "cases": cases}, f, indent=2)
+
+
+def report(name, timings, baseline, threshold):
+    lines = []
+    previous = baseline.get(name, {})
+    regressed = dict(compare(timings, previous, threshold))
+    for scale, t in timings.items():
+        line = f"{name:<36} {scale:>8} {t * 1000:>12.2f} ms"
+        if scale in previous:
+            change = t / previous[scale] - 1
+            line += f" {change:>+8.1%}"
+            if scale in regressed:
+                line += "  REGRESSION"
+        lines.append(line)
+    exponents = ", ".join(f"{k:.2f}" for k in slopes(timings))
+    if exponents:
+        lines.append(f"{'':<36} {'growth':>8} n^({exponents})")
+    return "\n".join(lines), bool(regressed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solvers")
+    parser.add_argument("-k", dest="filter", help="only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="flag timings this fraction slower than the baseline (default: 0.2)",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the new baseline"
+    )
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    any_regressed = False
+    for case in cases():
+        if args.filter and args.filter not in case.name:
+            continue
+        results[case.name] = time_case(case, args.repeat)
+        text, regressed = report(
+            case.name, results[case.name], baseline, args.threshold
+        )
+        any_regressed |= regressed
+        print(text, flush=True)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+    return 1 if any_regressed else 0
+
+
+def test_slopes():
+    timings = {"10": 1.0, "100": 100.0, "1000": 1000.0}
+    assert [round(k, 6) for k in slopes(timings)] == [2.0, 1.0]
+
+
+def test_compare():
+    baseline = {"10": 1.0, "100": 2.0}
+    assert compare({"10": 1.1, "100": 3.0}, baseline, 0.2) == [("100", 0.5)]
+    assert compare({"10": 1.1, "1000": 3.0}, baseline, 0.2) == []
+
+
+def test_cases_run():
+    for case in cases():
+        args = case.setup(case.scales[0])
+        case.func(*args)
+
+
+def test_baseline_roundtrip(tmp_path):
+    path = tmp_path / "baseline.json"
+    save_baseline(path, {"a": {"1": 0.5}})
+    save_baseline(path, {"b": {"1": 0.25}})
+    assert load_baseline(path) == {"a": {"1": 0.5}, "b": {"1": 0.25}}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
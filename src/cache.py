@@ -0,0 +1,186 @@
+import ast
+import hashlib
+import json
+import os
+import pickle
+from functools import cache
+from pathlib import Path
+
+import instrument
+
+SRC = Path(__file__).parent
+CACHE_DIR = ".aoc-cache"
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def local_imports(path):
+    """
+    Return the modules in src/ that the module at path imports, directly
+    or through other local modules, including the module itself.
+    """
+    seen = {}
+    todo = [Path(path)]
+    while todo:
+        path = todo.pop()
+        if path.name in seen:
+            continue
+        source = path.read_bytes()
+        seen[path.name] = source
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                dep = SRC / f"{name.split('.')[0]}.py"
+                if dep.exists():
+                    todo.append(dep)
+    return seen
+
+
+@cache
+def source_digest(module):
+    """
+    Hash the source of a day module and of every local module it uses,
+    so that editing any of them gives the day new cache keys. Sources
+    are only read once per process.
+    """
+    h = hashlib.sha256()
+    for name, source in sorted(local_imports(module.__file__).items()):
+        h.update(name.encode() + b"\0")
+        h.update(hashlib.sha256(source).digest())
+    return h.hexdigest()
+
+
+def cache_key(module, data):
+    h = hashlib.sha256(source_digest(module).encode())
+    h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()
+
+
+class Cache:
+    """
+    An on-disk store of parsed inputs (pickled) and answers (JSON) for
+    each cache key. Files are touched whenever they're read, and the least
+    recently used ones are removed once the store grows past max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key, suffix):
+        return self.directory / key[:2] / f"{key}{suffix}"
+
+    def _read(self, path):
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def _write(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        self.evict()
+
+    def get_parsed(self, key):
+        """
+        Return (True, data) for a cached parse, or (False, None).
+        """
+        data = self._read(self._path(key, ".pickle"))
+        if data is not None:
+            try:
+                parsed = pickle.loads(data)
+            except Exception:
+                pass
+            else:
+                instrument.count("cache.parse_hits")
+                return True, parsed
+        instrument.count("cache.parse_misses")
+        return False, None
+
+    def put_parsed(self, key, parsed):
+        """
+        Store a parse, returning False if it can't be pickled.
+        """
+        try:
+            data = pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        self._write(self._path(key, ".pickle"), data)
+        return True
+
+    def get_answers(self, key):
+        data = self._read(self._path(key, ".json"))
+        answers = {} if data is None else json.loads(data)
+        instrument.count("cache.answer_hits", len(answers))
+        return answers
+
+    def put_answers(self, key, answers):
+        answers = {**self.get_answers(key), **answers}
+        self._write(self._path(key, ".json"), json.dumps(answers).encode())
+
+    def entries(self):
+        if not self.directory.exists():
+            return []
+        return [p for p in self.directory.glob("*/*") if p.suffix != ".tmp"]
+
+    def evict(self):
+        """
+        Remove the least recently used files until the cache fits.
+        """
+        stats = [(p, p.stat()) for p in self.entries()]
+        total = sum(st.st_size for _, st in stats)
+        for path, st in sorted(stats, key=lambda e: e[1].st_mtime_ns):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+
+    def clear(self):
+        for path in self.entries():
+            path.unlink(missing_ok=True)
+
+
+def test_roundtrip(tmp_path):
+    cache = Cache(tmp_path)
+    assert cache.get_parsed("ab12") == (False, None)
+    assert cache.put_parsed("ab12", {"grid": [1, 2, 3]})
+    assert cache.get_parsed("ab12") == (True, {"grid": [1, 2, 3]})
+
+    cache.put_answers("ab12", {"part_one": "7"})
+    cache.put_answers("ab12", {"part_two": "8"})
+    assert cache.get_answers("ab12") == {"part_one": "7", "part_two": "8"}
+    assert not cache.put_parsed("cd34", lambda: None)
+
+
+def test_evict(tmp_path):
+    cache = Cache(tmp_path, max_bytes=3500)
+    for age, key in enumerate(("aa", "bb", "cc")):
+        cache.put_parsed(key, bytes(1000))
+        os.utime(cache._path(key, ".pickle"), ns=(age, age))
+    # reading aa makes bb the least recently used
+    cache.get_parsed("aa")
+    cache.put_parsed("dd", bytes(1000))
+    assert [cache.get_parsed(k)[0] for k in ("aa", "bb", "cc", "dd")] == [
+        True,
+        False,
+        True,
+        True,
+    ]
+
+
+def test_keys():
+    import day11
+    import day16
+
+    assert cache_key(day11, b"1 2") != cache_key(day11, b"1 3")
+    assert cache_key(day11, b"1 2") != cache_key(day16, b"1 2")
+    # day16 depends on the grid and the search engine
+    assert {"day16.py", "grid.py", "search.py"} <= set(local_imports(day16.__file__))
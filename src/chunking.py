@@ -0,0 +1,25 @@
+import pytest
+
+# numpy elements a vectorized solver works on per pass. Working through a
+# big input in passes of this size bounds the size of the temporaries, so
+# memory stays flat however large the input grows.
+CHUNK = 1 << 22
+
+
+def batches(start, stop, cost=1):
+    """
+    Split range(start, stop) into (lo, hi) ranges of items that each take
+    `cost` elements to work on, about CHUNK elements to a range and never
+    less than one item.
+    """
+    step = max(1, CHUNK // cost)
+    for lo in range(start, stop, step):
+        yield lo, min(lo + step, stop)
+
+
+def test_batches(monkeypatch):
+    monkeypatch.setitem(globals(), "CHUNK", 10)
+    assert list(batches(3, 25)) == [(3, 13), (13, 23), (23, 25)]
+    assert list(batches(0, 7, cost=3)) == [(0, 3), (3, 6), (6, 7)]
+    assert list(batches(0, 2, cost=40)) == [(0, 1), (1, 2)]
+    assert list(batches(5, 5)) == []
@@ -1,74 +1,170 @@
-def get_directional_strings(mat: list[str], x: int, y: int) -> list[str]:
-    strings = []
-    if mat[y][x] != "X" and mat[y][x] != "S":
-        return []
-
-    # right
-    if x < len(mat[0]) - 3:
-        strings.append(mat[y][x : x + 4])
-    # left
-    if x >= 3:
-        strings.append(mat[y][x] + mat[y][x - 1] + mat[y][x - 2] + mat[y][x - 3])
-    # up
-    if y >= 3:
-        strings.append(mat[y][x] + mat[y - 1][x] + mat[y - 2][x] + mat[y - 3][x])
-    # down
-    if y < len(mat) - 3:
-        strings.append(mat[y][x] + mat[y + 1][x] + mat[y + 2][x] + mat[y + 3][x])
-    # up-left
-    if y >= 3 and x >= 3:
-        strings.append(
-            mat[y][x] + mat[y - 1][x - 1] + mat[y - 2][x - 2] + mat[y - 3][x - 3]
-        )
-    # up-right
-    if y >= 3 and x < len(mat[0]) - 3:
-        strings.append(
-            mat[y][x] + mat[y - 1][x + 1] + mat[y - 2][x + 2] + mat[y - 3][x + 3]
-        )
-    # down-left
-    if y < len(mat) - 3 and x >= 3:
-        strings.append(
-            mat[y][x] + mat[y + 1][x - 1] + mat[y + 2][x - 2] + mat[y + 3][x - 3]
-        )
-    # down-right
-    if y < len(mat) - 3 and x < len(mat[0]) - 3:
-        strings.append(
-            mat[y][x] + mat[y + 1][x + 1] + mat[y + 2][x + 2] + mat[y + 3][x + 3]
-        )
-
-    return strings
+import sys
+from collections import deque
+
+import pytest
+
+from chunking import batches
+from grid import Grid
+from inputs import Input, as_bytes
+from wordsearch import WordSearch
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+X, M, A, S = b"XMAS"
+
+
+def as_grid(mat):
+    # three cells of padding lets a word run off any edge without a bounds check
+    if isinstance(mat, Grid):
+        if mat.pad >= 3:
+            return mat
+        mat = mat.lines()
+    return Grid.from_lines(mat, pad=3, border=b".")
 
 
 def count_crossing_mas(mat) -> int:
+    grid = as_grid(mat)
+    cells = grid.cells
+    s = grid.stride
+
     total = 0
-    rows = len(mat[0])
-    cols = len(mat)
-    for j in range(rows):
-        for i in range(cols):
-            if i == 0 or i == rows - 1 or j == 0 or j == cols - 1:
-                continue
-
-            if mat[j][i] != "A":
-                continue
-
-            # check_cross
-            diag1 = mat[j - 1][i - 1] + mat[j][i] + mat[j + 1][i + 1]
-            diag2 = mat[j - 1][i + 1] + mat[j][i] + mat[j + 1][i - 1]
-            if (diag1 == "MAS" or diag1 == "SAM") and (
-                diag2 == "MAS" or diag2 == "SAM"
-            ):
+    for i in grid.find_all("A"):
+        # check_cross
+        a, b = cells[i - s - 1], cells[i + s + 1]
+        c, d = cells[i - s + 1], cells[i + s - 1]
+        if (a == M and b == S or a == S and b == M) and (
+            c == M and d == S or c == S and d == M
+        ):
+            total += 1
+    return total
+
+
+def count(mat) -> int:
+    grid = as_grid(mat)
+    cells = grid.cells
+
+    total = 0
+    for i in grid.find_all("X"):
+        for o in grid.offsets8:
+            if cells[i + o] == M and cells[i + 2 * o] == A and cells[i + 3 * o] == S:
                 total += 1
     return total
 
 
-def count(mat: list[str]) -> int:
+def chunks(grid, reach):
+    """
+    Split the flat cell array, from the first cell inside the padding to
+    the last, into ranges whose cells can all look `reach` rows and
+    columns away without leaving the array.
+    """
+    if grid.pad < reach:
+        raise ValueError(f"a grid with {grid.pad} cells of padding can't reach {reach}")
+    lo = grid.pad * (grid.stride + 1)
+    return batches(lo, len(grid.cells) - lo)
+
+
+def count_vectorized(mat) -> int:
+    """
+    count() with numpy: for each direction the flat cell array is compared
+    with itself shifted by one, two and three steps in that direction.
+    """
+    grid = as_grid(mat)
+    a = np.frombuffer(grid.cells, dtype=np.uint8)
+
+    total = 0
+    for lo, hi in chunks(grid, 3):
+        xs = a[lo:hi] == X
+        for o in grid.offsets8:
+            found = xs & (a[lo + o : hi + o] == M)
+            found &= a[lo + 2 * o : hi + 2 * o] == A
+            found &= a[lo + 3 * o : hi + 3 * o] == S
+            total += int(np.count_nonzero(found))
+    return total
+
+
+def mas(a, lo, hi, o):
+    # M and S on opposite ends of the diagonal through each cell
+    p, q = a[lo - o : hi - o], a[lo + o : hi + o]
+    return (p == M) & (q == S) | (p == S) & (q == M)
+
+
+def count_crossing_mas_vectorized(mat) -> int:
+    grid = as_grid(mat)
+    a = np.frombuffer(grid.cells, dtype=np.uint8)
+    s = grid.stride
+
     total = 0
-    for i in range(len(mat[0])):
-        for j in range(len(mat)):
-            total += sum(s == "XMAS" for s in get_directional_strings(mat, i, j))
+    for lo, hi in chunks(grid, 1):
+        found = (a[lo:hi] == A) & mas(a, lo, hi, s + 1) & mas(a, lo, hi, s - 1)
+        total += int(np.count_nonzero(found))
     return total
 
 
+def count_words(mat, words):
+    """
+    Count every word of a list in all 8 directions in one pass over the
+    grid, returning a Counter.
+    """
+    return WordSearch(words).count(as_grid(mat))
+
+
+XMAS, SAMX = (X, M, A, S), (S, A, M, X)
+# (top left, top right, centre, bottom left, bottom right) of every X-MAS
+OTHER = {M: S, S: M}
+CROSSES = {(p, q, A, OTHER[q], OTHER[p]) for p in (M, S) for q in (M, S)}
+
+
+def stream_rows(f, offset=0):
+    """
+    Yield the rows of a grid from a binary file object one at a time,
+    starting offset bytes in (stdin included), holding only one row.
+    """
+    if offset and f.seekable():
+        f.seek(offset)
+    else:
+        # a pipe can't seek, so read past the offset instead
+        while offset > 0:
+            skipped = f.read(min(offset, 1 << 16))
+            if not skipped:
+                return
+            offset -= len(skipped)
+    for line in f:
+        line = line.rstrip(b"\r\n")
+        if line:
+            yield line
+
+
+def count_streaming(rows):
+    """
+    Count XMAS and X-MAS in a grid given as an iterable of bytes rows,
+    returning (xmas, crosses). Only the last four rows are kept: every
+    match is counted when the row holding its bottom end arrives, so
+    memory stays the same however many rows there are.
+    """
+    window = deque(maxlen=4)
+    xmas = crosses = 0
+    for row in rows:
+        window.append(row)
+        xmas += row.count(b"XMAS") + row.count(b"SAMX")
+        if len(window) >= 3:
+            r0, r1, r2 = window[-3], window[-2], window[-1]
+            crosses += sum(
+                cross in CROSSES for cross in zip(r0, r0[2:], r1[1:], r2, r2[2:])
+            )
+        if len(window) == 4:
+            r0, r1, r2, r3 = window
+            for line in (
+                zip(r0, r1, r2, r3),
+                zip(r0, r1[1:], r2[2:], r3[3:]),
+                zip(r0[3:], r1[2:], r2[1:], r3),
+            ):
+                xmas += sum(cells == XMAS or cells == SAMX for cells in line)
+    return xmas, crosses
+
+
 def load_input(f):
     mat = []
     for ln in f:
@@ -76,11 +172,33 @@ def load_input(f):
     return mat
 
 
+INPUT = "data/input4.txt"
+
+
+def load(f):
+    return Grid.from_bytes(as_bytes(f), pad=3, border=b".")
+
+
+def part_one(mat):
+    return count(mat) if np is None else count_vectorized(mat)
+
+
+def part_two(mat):
+    return count_crossing_mas(mat) if np is None else count_crossing_mas_vectorized(mat)
+
+
+def stream(path="-", offset=0):
+    if path == "-":
+        return count_streaming(stream_rows(sys.stdin.buffer, offset))
+    with open(path, "rb") as f:
+        return count_streaming(stream_rows(f, offset))
+
+
 def main():
-    with open("data/input4.txt") as f:
-        mat = load_input(f)
-        print(f"part 1: {count(mat)}")
-        print(f"part 2: {count_crossing_mas(mat)}")
+    with Input.open(INPUT) as f:
+        mat = load(f)
+    print(f"part 1: {part_one(mat)}")
+    print(f"part 2: {part_two(mat)}")
 
 
 def test_advent_example():
@@ -100,6 +218,11 @@ MXMXAXMASX""")
     assert len(mat) == 10
     assert len(mat[0]) == 10
     assert count(mat) == 18
+    assert count_words(mat, ["XMAS", "SAMX", "AM"]) == {
+        "XMAS": 18,
+        "SAMX": 18,
+        "AM": 77,
+    }
 
     test_input = StringIO(""".M.S......
 ..A..MSMS.
@@ -115,5 +238,62 @@ M.M.M.M.M.
     assert count_crossing_mas(mat) == 9
 
 
+def test_streaming(tmp_path):
+    import random
+
+    rng = random.Random(13)
+    for rows, cols in [(1, 4), (3, 3), (4, 1), (10, 10), (31, 17)]:
+        lines = ["".join(rng.choice("XMAS") for _ in range(cols)) for _ in range(rows)]
+        expected = count(lines), count_crossing_mas(lines)
+        assert count_streaming(ln.encode() for ln in lines) == expected
+
+    path = tmp_path / "input4.txt"
+    header = b"skipped\n"
+    path.write_bytes(header + "\n".join(lines).encode() + b"\n")
+    assert stream(path, len(header)) == expected
+
+
+@pytest.mark.skipif(np is None, reason="needs numpy")
+def test_vectorized(monkeypatch):
+    import chunking
+
+    # a chunk reads the cells up to three rows past its end, so the words
+    # from an X and the crosses on an A next to a boundary are still found
+    star = [
+        "S.MS..S",
+        ".A.A.A.",
+        "S.MMM..",
+        "SAMXMAS",
+        "..MMM.M",
+        ".A.A.A.",
+        "S..SS.S",
+    ]  # fmt: skip
+    grid = as_grid(star)
+    assert (count(grid), count_crossing_mas(grid)) == (8, 2)
+    first = grid.pad * (grid.stride + 1)
+    for r, c in [(3, 3), (1, 1), (5, 5)]:
+        for extra in (0, 1):
+            # the cell starts the second chunk, then ends the first
+            monkeypatch.setattr(chunking, "CHUNK", grid.index(r, c) - first + extra)
+            assert len(list(chunks(grid, 3))) > 1
+            assert count_vectorized(grid) == 8
+            assert count_crossing_mas_vectorized(grid) == 2
+
+    # grids built elsewhere with less padding get enough for a whole word
+    for pad in (1, 3, 4):
+        grid = Grid.from_lines(star, pad=pad)
+        assert count_vectorized(grid) == 8
+        assert count_crossing_mas_vectorized(grid) == 2
+        assert count(grid) == 8
+
+
 if __name__ == "__main__":
-    main()
+    # day04.py stream [path or - for stdin] [byte offset]
+    if len(sys.argv) > 1 and sys.argv[1] == "stream":
+        path = sys.argv[2] if len(sys.argv) > 2 else "-"
+        offset = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+        xmas, crosses = stream(path, offset)
+        print(f"part 1: {xmas}")
+        print(f"part 2: {crosses}")
+    else:
+        main()
@@ -1,31 +1,297 @@
 from collections import defaultdict
+from functools import cached_property, cmp_to_key
 from io import StringIO
+from itertools import pairwise
 from typing import Tuple
 import sys
 import pytest
 
+from chunking import batches
+from inputs import lines
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# the middle of an out of order update whose pages the rules don't order
+NO_ORDER = -1
+
+
+class RuleError(ValueError):
+    """
+    The rules don't put the pages of an update in a single order, because
+    two of its pages have no rule between them or the rules form a cycle.
+    """
+
+
+class RuleSet:
+    """
+    The page ordering rules compiled into a comparator over page ids.
+    """
+
+    def __init__(self, rules):
+        # page -> the pages that must come after it
+        self.after = {}
+        for a, b in rules:
+            self.after.setdefault(a, set()).add(b)
+        # the same as bitsets of page ids, and the reverse
+        self.after_bits = defaultdict(int)
+        self.before_bits = defaultdict(int)
+        for a, pages in self.after.items():
+            for b in pages:
+                self.after_bits[a] |= 1 << b
+                self.before_bits[b] |= 1 << a
+
+    def add(self, a, b):
+        self.after.setdefault(a, set()).add(b)
+        self.after_bits[a] |= 1 << b
+        self.before_bits[b] |= 1 << a
+
+    def remove(self, a, b):
+        pages = self.after.get(a, set())
+        pages.discard(b)
+        if not pages:
+            self.after.pop(a, None)
+        self.after_bits[a] &= ~(1 << b)
+        self.before_bits[b] &= ~(1 << a)
+
+    def before(self, a, b) -> bool:
+        return b in self.after.get(a, ())
+
+    def compare(self, a, b) -> int:
+        if self.before(a, b):
+            return -1
+        if self.before(b, a):
+            return 1
+        if a == b:
+            return 0
+        raise RuleError(f"no rule orders pages {a} and {b}")
+
+    def violation(self, update):
+        """
+        Return the first rule (a, b) that update breaks, with b seen
+        before a, or None if it breaks none.
+        """
+        seen = set()
+        for a in update:
+            broken = seen.intersection(self.after.get(a, ()))
+            if broken:
+                return a, next(b for b in update if b in broken)
+            seen.add(a)
+        return None
+
+    def is_ordered(self, update) -> bool:
+        return self.violation(update) is None
+
+    def order(self, update) -> list:
+        """
+        Return the pages of update sorted by the rules, raising RuleError
+        unless the rules give exactly one order.
+        """
+        pages = sorted(update, key=cmp_to_key(self.compare))
+        # the sort only compares some pairs, so check that every
+        # neighbouring pair has a rule (the order is unique) and that no
+        # rule between pages further apart is broken (there is no cycle)
+        for a, b in pairwise(pages):
+            if not self.before(a, b):
+                raise RuleError(f"no rule orders pages {a} and {b}")
+        broken = self.violation(pages)
+        if broken:
+            a, b = broken
+            raise RuleError(f"rule {a}|{b} makes a cycle among pages {update}")
+        return pages
+
+    def matrix(self):
+        """
+        Return a square bool array indexed by page id, True at [a, b]
+        when a must come before b.
+        """
+        size = 1 + max((max(a, *pages) for a, pages in self.after.items()), default=0)
+        m = np.zeros((size, size), dtype=bool)
+        for a, pages in self.after.items():
+            m[a, list(pages)] = True
+        return m
+
+
+def check_updates(rules, updates):
+    """
+    Check every update at once, returning (ordered, middles): whether each
+    update already follows the rules, and its middle page once sorted by
+    them. An update that's out of order when the rules don't give its
+    pages a single order has no middle, and gets NO_ORDER.
+
+    A page's place in the sorted update is given by how many of the
+    update's pages must come after it, so nothing is actually sorted: the
+    rules are a single order on the pages exactly when no two pages have
+    rules both ways, every pair has a rule, and those counts all differ.
+    """
+    if np is None:
+        return check_updates_bitset(rules, updates)
+
+    m = rules.matrix()
+    ordered = np.zeros(len(updates), dtype=bool)
+    middles = np.zeros(len(updates), dtype=np.int64)
+
+    by_length = defaultdict(list)
+    for i, u in enumerate(updates):
+        by_length[len(u)].append(i)
+    for n, indices in by_length.items():
+        indices = np.array(indices)
+        pages = np.array([updates[i] for i in indices], dtype=np.intp).reshape(-1, n)
+        if pages.size and pages.max() >= len(m):
+            # pages that no rule mentions
+            m = np.pad(m, (0, int(pages.max()) + 1 - len(m)))
+        later = np.tri(n, k=-1, dtype=bool)
+        for lo, hi in batches(0, len(indices), n * n):
+            u = pages[lo:hi]
+            # g[k, i, j]: page i of update k must come before page j
+            g = m[u[:, :, None], u[:, None, :]]
+            ok = ~(g & later).any(axis=(1, 2))
+            after = g.sum(axis=2)
+            mid = after == n - 1 - n // 2
+
+            single = ~(g & g.transpose(0, 2, 1)).any(axis=(1, 2))
+            single &= after.sum(axis=1) == n * (n - 1) // 2
+            single &= (np.sort(after, axis=1) == np.arange(n)).all(axis=1)
+
+            rows = np.arange(len(u))
+            middle = np.where(ok, u[:, n // 2], u[rows, mid.argmax(axis=1)])
+            ordered[indices[lo:hi]] = ok
+            middles[indices[lo:hi]] = np.where(ok | single, middle, NO_ORDER)
+    return ordered, middles
+
+
+def check_updates_bitset(rules, updates):
+    """
+    check_updates with a Python int per page as the bitset of the page
+    ids that must follow it.
+    """
+    checked = [check_update(rules, u) for u in updates]
+    return [ok for ok, _ in checked], [middle for _, middle in checked]
+
+
+def check_update(rules, u):
+    """
+    Return (ordered, middle) for one update, using the rule bitsets.
+    """
+    return try_update(rules, u) or (False, NO_ORDER)
+
+
+def try_update(rules, u):
+    """
+    check_update, but returning None rather than NO_ORDER.
+    """
+    after_bits, before_bits = rules.after_bits, rules.before_bits
+    n = len(u)
+    seen = 0
+    for p in u:
+        if after_bits.get(p, 0) & seen:
+            break
+        seen |= 1 << p
+    else:
+        return True, u[n // 2]
+
+    pages = 0
+    for p in u:
+        pages |= 1 << p
+    after = [(after_bits.get(p, 0) & pages).bit_count() for p in u]
+    both_ways = any(after_bits.get(p, 0) & before_bits.get(p, 0) & pages for p in u)
+    if both_ways or sorted(after) != list(range(n)):
+        return None
+    return False, u[after.index(n - 1 - n // 2)]
+
+
+def raise_for(rules, update):
+    # order() says which pages or rule are at fault
+    rules.order(update)
+    raise RuleError(f"the rules don't give pages {update} a single order")
+
+
+class RuleIndex:
+    """
+    The rules and a fixed list of updates, with both parts kept up to date
+    as single rules are added and removed.
+
+    A rule a|b can only change the updates holding both a and b, so an
+    index from each page to the updates holding it finds those, and only
+    they are checked again. Changes can pass through rules that don't give
+    some update a single order (swapping a rule takes a removal and an
+    add); such updates are left out of the totals until a later change
+    settles them, and part_two raises RuleError while any remain.
+    """
+
+    def __init__(self, rules, updates):
+        self.rules = RuleSet(rules)
+        self.updates = list(updates)
+        self.containing = defaultdict(set)
+        for i, u in enumerate(self.updates):
+            for p in u:
+                self.containing[p].add(i)
+        self.ordered = [False] * len(self.updates)
+        self.middles = [0] * len(self.updates)
+        self.unsettled = set()
+        self.totals = [0, 0]
+        try:
+            ordered, middles = check_updates(self.rules, self.updates)
+        except RuleError:
+            self._recheck(range(len(self.updates)))
+        else:
+            self.ordered = [bool(ok) for ok in ordered]
+            self.middles = [int(m) for m in middles]
+            for ok, middle in zip(self.ordered, self.middles):
+                self.totals[not ok] += middle
+
+    def part_one(self):
+        return self.totals[0]
+
+    def part_two(self):
+        if self.unsettled:
+            raise_for(self.rules, self.updates[min(self.unsettled)])
+        return self.totals[1]
+
+    def add_rule(self, a, b):
+        if not self.rules.before(a, b):
+            self.rules.add(a, b)
+            self._recheck(self.containing[a] & self.containing[b])
+
+    def remove_rule(self, a, b):
+        if self.rules.before(a, b):
+            self.rules.remove(a, b)
+            self._recheck(self.containing[a] & self.containing[b])
+
+    def _recheck(self, affected):
+        for i in affected:
+            if i not in self.unsettled:
+                self.totals[not self.ordered[i]] -= self.middles[i]
+            checked = try_update(self.rules, self.updates[i])
+            if checked is None:
+                self.unsettled.add(i)
+                self.ordered[i], self.middles[i] = False, 0
+                continue
+            ok, middle = checked
+            self.unsettled.discard(i)
+            self.totals[not ok] += middle
+            self.ordered[i], self.middles[i] = ok, middle
+
 
 class BeforeTracker:
     def __init__(self, mappings):
-        self.before_map = defaultdict(set)
-        for first, after in mappings:
-            self.before_map[first].add(after)
+        self.rules = RuleSet((int(a), int(b)) for a, b in mappings)
 
     def audit_list(self, nums: list[str], swap: bool = False) -> Tuple[list[str], bool]:
         """
-        Check if the given numbers following the ordering rules in self.before_map.
-        If swap is True, then perform a swap of numbers that are out of order.
+        Check if the given numbers follow the ordering rules in self.rules.
+        If swap is True and they don't, sort them in place by the rules,
+        raising RuleError if the rules don't give them a single order.
 
         Returns:
             Tuple[list[str], bool]: the corrected number list and if correction was required.
         """
-        correction_required = False
-        for i in range(len(nums) - 1):
-            for j in range(i + 1, len(nums)):
-                if nums[i] in self.before_map[nums[j]]:
-                    correction_required = True
-                    if swap:
-                        nums[i], nums[j] = nums[j], nums[i]
+        pages = [int(n) for n in nums]
+        correction_required = not self.rules.is_ordered(pages)
+        if swap and correction_required:
+            nums[:] = map(str, self.rules.order(pages))
         return nums, correction_required
 
 
@@ -115,23 +381,159 @@ def test_advent_example_part_two(mappings_and_tests):
     assert sum_results(results, is_part_two=True) == 123
 
 
-def main():
-    mappings = []
-    tests = []
+def test_load(test_input):
+    data = load(test_input)
+    assert data.updates[0] == (75, 47, 61, 53, 29)
+    assert "checked" not in vars(data)
+    assert part_one(data) == 143
+    assert part_two(data) == 123
 
-    with open("data/input5.txt") as f:
-        for ln in f:
-            if "|" in ln:
-                mappings.append(ln.strip().split("|"))
-            if "," in ln:
-                tests.append(ln.strip().split(","))
 
-    b = BeforeTracker(mappings)
-    results = [b.audit_list(t, False) for t in tests]
-    print(f"part 1: {sum_results(results)}")
+def test_rule_errors():
+    rules = RuleSet([(1, 2), (2, 3), (3, 1), (4, 5)])
+    assert rules.order([2, 1]) == [1, 2]
+    assert rules.violation([2, 1, 3]) == (1, 2)
+    with pytest.raises(RuleError, match="cycle"):
+        rules.order([1, 2, 3])
+    with pytest.raises(RuleError, match="no rule orders"):
+        rules.order([1, 4])
 
-    results = [b.audit_list(t, True) for t in tests]
-    print(f"part 2: {sum_results(results, True)}")
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_check_updates(monkeypatch, vectorized, test_input):
+    import pickle
+
+    import chunking
+
+    if vectorized and np is None:
+        pytest.skip("needs numpy")
+    if not vectorized:
+        monkeypatch.setitem(globals(), "np", None)
+
+    data = load(test_input)
+    assert pickle.loads(pickle.dumps(data.rules)).after == data.rules.after
+    # the updates are checked in passes of one length at a time, which take
+    # the example's 5 page updates one to a pass and its 3 page ones two to
+    # a pass at 25 cells, and every update on its own at 1
+    for chunk in (1 << 22, 25, 1):
+        monkeypatch.setattr(chunking, "CHUNK", chunk)
+        ordered, middles = check_updates(data.rules, data.updates)
+        assert list(ordered) == [True, True, True, False, False, False]
+        assert list(middles) == [61, 53, 29, 47, 29, 47]
+
+    cyclic = RuleSet([(1, 2), (2, 3), (3, 1), (4, 5)])
+    ordered, middles = check_updates(cyclic, [(1, 2), (4, 5, 6), (3, 2, 1), (5, 4)])
+    assert list(ordered) == [True, True, False, False]
+    assert list(middles) == [2, 5, NO_ORDER, 5]
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_unordered_update(monkeypatch, vectorized):
+    if vectorized and np is None:
+        pytest.skip("needs numpy")
+    if not vectorized:
+        monkeypatch.setitem(globals(), "np", None)
+
+    # nothing orders page 4, which only matters to part two
+    data = load(StringIO("1|2\n2|3\n\n1,2,3\n2,1,4\n"))
+    assert part_one(data) == 2
+    with pytest.raises(RuleError, match="no rule orders pages 4 and 1"):
+        part_two(data)
+
+    data = load(StringIO("1|2\n2|3\n3|1\n\n1,2\n3,2,1\n"))
+    assert part_one(data) == 2
+    with pytest.raises(RuleError, match="cycle"):
+        part_two(data)
+
+
+def test_rule_index():
+    import random
+
+    rng = random.Random(16)
+    order = rng.sample(range(10, 100), 20)
+    rules = [(order[i], order[j]) for i in range(20) for j in range(i + 1, 20)]
+    updates = [tuple(rng.sample(order, rng.randrange(3, 10, 2))) for _ in range(100)]
+    index = RuleIndex(rules, updates)
+    assert (index.part_one(), index.part_two()) == solve(
+        PrintQueue(RuleSet(rules), updates)
+    )
+
+    # swapping neighbours in the order keeps the rules a single order
+    for _ in range(50):
+        k = rng.randrange(19)
+        a, b = order[k], order[k + 1]
+        index.remove_rule(a, b)
+        index.add_rule(b, a)
+        order[k], order[k + 1] = b, a
+        rules = [(order[i], order[j]) for i in range(20) for j in range(i + 1, 20)]
+        assert (index.part_one(), index.part_two()) == solve(
+            PrintQueue(RuleSet(rules), updates)
+        )
+
+    # a cycle leaves the updates out until the rule is removed again
+    a, b, c = order[:3]
+    index = RuleIndex([(a, b), (b, c), (a, c)], [(c, b, a), (a, b, c)])
+    assert index.totals == [b, b]
+    index.add_rule(c, a)
+    assert index.part_one() == 0 and len(index.unsettled) == 2
+    with pytest.raises(RuleError, match="cycle"):
+        index.part_two()
+    index.remove_rule(c, a)
+    assert index.part_two() == b and not index.unsettled
+
+
+INPUT = "data/input5.txt"
+
+
+def load(f):
+    rules, updates = [], []
+    for ln in lines(f):
+        ln = bytes(ln)
+        if b"|" in ln:
+            a, b = ln.split(b"|")
+            rules.append((int(a), int(b)))
+        elif b"," in ln:
+            updates.append(tuple(map(int, ln.split(b","))))
+    return PrintQueue(RuleSet(rules), updates)
+
+
+class PrintQueue:
+    """
+    The rules and updates. Both parts come out of one batch check of the
+    updates, made by whichever part runs first.
+    """
+
+    def __init__(self, rules, updates):
+        self.rules = rules
+        self.updates = updates
+
+    @cached_property
+    def checked(self):
+        return check_updates(self.rules, self.updates)
+
+
+def solve(data):
+    return part_one(data), part_two(data)
+
+
+def part_one(data):
+    ordered, middles = data.checked
+    return sum(int(m) for ok, m in zip(ordered, middles) if ok)
+
+
+def part_two(data):
+    ordered, middles = data.checked
+    for u, m in zip(data.updates, middles):
+        if m == NO_ORDER:
+            raise_for(data.rules, u)
+    return sum(int(m) for ok, m in zip(ordered, middles) if not ok)
+
+
+def main():
+    with open(INPUT) as f:
+        data = load(f)
+    print(f"part 1: {part_one(data)}")
+    print(f"part 2: {part_two(data)}")
 
 
 if __name__ == "__main__":
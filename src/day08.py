@@ -1,6 +1,18 @@
 from collections import defaultdict, Counter
+from math import gcd
 import pytest
 
+from chunking import batches
+from grid import Grid
+from inputs import as_bytes
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EMPTY = ord(".")
+
 
 def read_points_from_lines(matrix):
     char_to_point = defaultdict(set)
@@ -13,7 +25,9 @@ def read_points_from_lines(matrix):
 
 
 def solve(matrix, part_two=False):
-    matrix = [ln.strip() for ln in matrix.readlines()]
+    if isinstance(matrix, Grid):
+        matrix = matrix.lines()
+    matrix = [ln.strip() for ln in matrix]
 
     def in_bounds(point):
         row, col = point
@@ -31,7 +45,11 @@ def solve(matrix, part_two=False):
                 dy = j[0] - i[0]
 
                 if part_two:
-                    candidate = i
+                    # every grid point on the line counts, so step by the
+                    # smallest whole delta and walk back from j through i
+                    g = gcd(dx, dy)
+                    dx, dy = dx // g, dy // g
+                    candidate = j
                     while in_bounds(candidate):
                         nodes.add(candidate)
                         candidate = (candidate[0] - dy, candidate[1] - dx)
@@ -43,12 +61,212 @@ def solve(matrix, part_two=False):
     return list(nodes)
 
 
-def main():
-    with open("data/input8.txt") as f:
-        print(f"part 1: {len(solve(f))}")
+def antennas(grid):
+    """
+    Return {frequency: (k, 2) array of the rows and columns of its k
+    antennas} for a grid without padding.
+    """
+    cells = np.frombuffer(grid.cells, dtype=np.uint8)
+    found = np.flatnonzero(cells != EMPTY)
+    freqs = cells[found]
+    order = np.argsort(freqs, kind="stable")
+    found, freqs = found[order], freqs[order]
+    starts = np.flatnonzero(np.diff(freqs, prepend=-1))
+    points = np.stack(np.divmod(found, grid.cols), axis=1)
+    return {
+        chr(freqs[lo]): points[lo:hi]
+        for lo, hi in zip(starts, [*starts[1:], len(found)])
+    }
+
+
+def pair_blocks(k, per_pair):
+    """
+    Yield (first, second) index arrays covering every pair of k antennas
+    once, in blocks of about chunking.CHUNK // per_pair pairs. A block
+    holds whole rows of pairs that share their first antenna.
+    """
+    for lo, hi in batches(0, k, per_pair * k):
+        i, j = np.nonzero(np.arange(lo, hi)[:, None] < np.arange(k))
+        yield i + lo, j
+
+
+def lines_through(a, step, rows, cols):
+    """
+    Return every grid point on the lines through points a (n, 2) with
+    steps (n, 2), as flat cell indices.
+    """
+    # the range of t keeping a + t * step inside the grid, taken for each
+    # axis with negative steps mirrored so the step is positive
+    lo = np.full(len(a), -(rows + cols))
+    hi = np.full(len(a), rows + cols)
+    for axis, size in enumerate((rows, cols)):
+        s = step[:, axis]
+        x = np.where(s < 0, size - 1 - a[:, axis], a[:, axis])
+        s = np.abs(s)
+        moving = s > 0
+        s = np.maximum(s, 1)
+        lo = np.where(moving, np.maximum(lo, -(x // s)), lo)
+        hi = np.where(moving, np.minimum(hi, (size - 1 - x) // s), hi)
+
+    counts = hi - lo + 1
+    line = np.repeat(np.arange(len(a)), counts)
+    t = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - lo, counts)
+    r = a[line, 0] + t * step[line, 0]
+    c = a[line, 1] + t * step[line, 1]
+    return r * cols + c
+
+
+def antinode_mask(grid, part_two=False):
+    """
+    solve() with numpy, returning a flat bool mask of the antinodes.
+
+    Each pair of same frequency antennas is taken once. In part one its
+    two antinodes are the antennas pushed a delta further apart; in part
+    two the delta is divided by its GCD and the whole line through the
+    pair is clipped to the grid in closed form rather than walked.
+    """
+    rows, cols = grid.rows, grid.cols
+    mask = np.zeros(rows * cols, dtype=bool)
+    for points in antennas(grid).values():
+        per_pair = max(rows, cols) if part_two else 2
+        for i, j in pair_blocks(len(points), per_pair):
+            a, b = points[i], points[j]
+            d = b - a
+            if part_two:
+                g = np.gcd(d[:, 0], d[:, 1])[:, None]
+                mask[lines_through(a, d // g, rows, cols)] = True
+                continue
+            for node in (a - d, b + d):
+                inside = (node >= 0).all(axis=1)
+                inside &= (node[:, 0] < rows) & (node[:, 1] < cols)
+                node = node[inside]
+                mask[node[:, 0] * cols + node[:, 1]] = True
+    return mask
+
+
+class AntennaMap:
+    """
+    Antennas on a fixed size grid that can be added and removed one at a
+    time, with the number of antinodes for both parts kept up to date.
+
+    Part one keeps a count per cell of the antenna pairs with an antinode
+    there. Part two keeps a count per line of the pairs that lie on it and
+    a count per cell of the lines through it, so a cell's walk only
+    happens when a line appears or disappears. An edit costs time in
+    proportion to the number of antennas of its frequency, plus the
+    length of each line it creates or removes.
+    """
+
+    def __init__(self, rows, cols, points=None):
+        self.rows = rows
+        self.cols = cols
+        self.points = defaultdict(set)
+        self.occupied = {}
+        self.nodes = Counter()
+        self.lines = Counter()
+        self.covered = Counter()
+        self.counts = [0, 0]
+        for freq, pts in (points or {}).items():
+            for r, c in pts:
+                self.add(freq, r, c)
+
+    @classmethod
+    def from_lines(cls, matrix):
+        matrix = [ln.strip() for ln in matrix if ln.strip()]
+        cols = len(matrix[0]) if matrix else 0
+        return cls(len(matrix), cols, read_points_from_lines(matrix))
+
+    def part_one(self):
+        return self.counts[0]
+
+    def part_two(self):
+        return self.counts[1]
+
+    def add(self, freq, r, c):
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            raise ValueError(f"({r}, {c}) is outside the grid")
+        if (r, c) in self.occupied:
+            raise ValueError(f"({r}, {c}) already has an antenna")
+        self.occupied[r, c] = freq
+        for other in self.points[freq]:
+            self._pair((r, c), other, 1)
+        self.points[freq].add((r, c))
+
+    def remove(self, freq, r, c):
+        if self.occupied.get((r, c)) != freq:
+            raise KeyError(f"no {freq!r} antenna at ({r}, {c})")
+        del self.occupied[r, c]
+        self.points[freq].remove((r, c))
+        for other in self.points[freq]:
+            self._pair((r, c), other, -1)
+
+    def _pair(self, a, b, change):
+        dr, dc = b[0] - a[0], b[1] - a[1]
+        for node in ((a[0] - dr, a[1] - dc), (b[0] + dr, b[1] + dc)):
+            if 0 <= node[0] < self.rows and 0 <= node[1] < self.cols:
+                self._count(self.nodes, node, change, 0)
+
+        # a line is its reduced direction, pointing down or right, and
+        # dc * r - dr * c, which is the same for every point on it
+        g = gcd(dr, dc)
+        dr, dc = dr // g, dc // g
+        if dr < 0 or dr == 0 and dc < 0:
+            dr, dc = -dr, -dc
+        line = dr, dc, dc * a[0] - dr * a[1]
+        self.lines[line] += change
+        if self.lines[line] == (1 if change > 0 else 0):
+            for cell in line_cells(a, (dr, dc), self.rows, self.cols):
+                self._count(self.covered, cell, change, 1)
+        if not self.lines[line]:
+            del self.lines[line]
+
+    def _count(self, counter, cell, change, part):
+        counter[cell] += change
+        if counter[cell] == (1 if change > 0 else 0):
+            self.counts[part] += change
+        if not counter[cell]:
+            del counter[cell]
 
-    with open("data/input8.txt") as f:
-        print(f"part 2: {len(solve(f, part_two=True))}")
+
+def line_cells(a, step, rows, cols):
+    """
+    Yield every cell of the grid on the line through a with step.
+    """
+    lo, hi = -(rows + cols), rows + cols
+    for x, s, size in ((a[0], step[0], rows), (a[1], step[1], cols)):
+        if s < 0:
+            x, s = size - 1 - x, -s
+        if s:
+            lo, hi = max(lo, -(x // s)), min(hi, (size - 1 - x) // s)
+    for t in range(lo, hi + 1):
+        yield a[0] + t * step[0], a[1] + t * step[1]
+
+
+INPUT = "data/input8.txt"
+
+
+def load(f):
+    # no padding, since a border of "#" would read as antennas
+    return Grid.from_bytes(as_bytes(f), pad=0)
+
+
+def part_one(grid):
+    if np is None:
+        return len(solve(grid))
+    return int(np.count_nonzero(antinode_mask(grid)))
+
+
+def part_two(grid):
+    if np is None:
+        return len(solve(grid, part_two=True))
+    return int(np.count_nonzero(antinode_mask(grid, part_two=True)))
+
+
+def main():
+    with open(INPUT) as f:
+        grid = load(f)
+    print(f"part 1: {part_one(grid)}")
+    print(f"part 2: {part_two(grid)}")
 
 
 @pytest.fixture
@@ -92,6 +310,69 @@ def test_solve(test_lines):
     nodes = solve(test_lines)
     assert len(nodes) == 33
 
+    test_lines.seek(0)
+    grid = load(test_lines)
+    assert part_one(grid) == 33
+    assert part_two(grid) == len(solve(grid, part_two=True))
+
+
+def test_gcd_step():
+    # (1, 1) and (3, 3) lie between and beyond antennas two cells apart
+    lines = ["a....", ".....", "..a..", ".....", "....."]
+    assert sorted(solve(lines, part_two=True)) == [(i, i) for i in range(5)]
+
+
+@pytest.mark.skipif(np is None, reason="needs numpy")
+def test_antinode_mask(monkeypatch, test_lines):
+    import chunking
+
+    lines = test_lines.readlines()
+    test_lines.seek(0)
+    grid = load(test_lines)
+    # the 13 "#" antennas make 13 rows of pairs: a block takes one row when
+    # CHUNK is smaller than a row, and the last block is short when the
+    # rows don't split evenly
+    k = 13
+    for chunk in (1, 2 * k * 3, 12 * k * 5, 1 << 22):
+        monkeypatch.setattr(chunking, "CHUNK", chunk)
+        for per_pair in (2, 12):
+            i, j = map(np.concatenate, zip(*pair_blocks(k, per_pair)))
+            assert sorted(zip(i.tolist(), j.tolist())) == [
+                (a, b) for a in range(k) for b in range(a + 1, k)
+            ]
+        for part_two in (False, True):
+            expected = {r * grid.cols + c for r, c in solve(lines, part_two)}
+            assert set(np.flatnonzero(antinode_mask(grid, part_two))) == expected
+
+
+def test_antenna_map():
+    import random
+
+    rng = random.Random(18)
+    rows, cols = 14, 11
+    antennas = AntennaMap(rows, cols)
+    for _ in range(300):
+        if antennas.occupied and rng.random() < 0.4:
+            (r, c), freq = rng.choice(sorted(antennas.occupied.items()))
+            antennas.remove(freq, r, c)
+        else:
+            r, c = rng.randrange(rows), rng.randrange(cols)
+            if (r, c) in antennas.occupied:
+                continue
+            antennas.add(rng.choice("aB0"), r, c)
+
+        lines = [["."] * cols for _ in range(rows)]
+        for (r, c), freq in antennas.occupied.items():
+            lines[r][c] = freq
+        lines = ["".join(ln) for ln in lines]
+        assert antennas.part_one() == len(solve(lines))
+        assert antennas.part_two() == len(solve(lines, part_two=True))
+
+    rebuilt = AntennaMap.from_lines(lines)
+    assert rebuilt.counts == antennas.counts
+    with pytest.raises(KeyError):
+        antennas.remove("z", 0, 0)
+
 
 if __name__ == "__main__":
     import sys
@@ -53,8 +53,13 @@ const Solver = struct {
                         try self.nodes.put(Point{ .r = ny, .c = nx }, true);
                     },
                     .two => {
-                        var n = one;
-                        while (self.contains(n)) : (n = Point{ .r = n.r - dy, .c = n.c - dx }) {
+                        // step by the smallest whole delta so no grid point on
+                        // the line is skipped, walking back from two through one
+                        const g: i64 = @intCast(std.math.gcd(@abs(dx), @abs(dy)));
+                        const sx = @divExact(dx, g);
+                        const sy = @divExact(dy, g);
+                        var n = two;
+                        while (self.contains(n)) : (n = Point{ .r = n.r - sy, .c = n.c - sx }) {
                             try self.nodes.put(n, true);
                         }
                     },
@@ -1,99 +1,121 @@
-def get_files(layout):
-    files = []
-    start = 0
-    end = start + 1
-    while end < len(layout):
-        while end < len(layout) and layout[end] == layout[start]:
-            end += 1
-
-        if layout[start] != ".":
-            files.append([start, end])
-        start = end
-        end = start + 1
-    return files
-
-
-def get_spaces(layout):
-    spaces = []
-    start = layout.index(".")
-    end = start + 1
-    while end < len(layout):
-        while end < len(layout) and layout[end] == layout[start]:
-            end += 1
-
-        if layout[start] == ".":
-            spaces.append([start, end])
-        start = end
-        end = start + 1
-    return spaces
-
-
-def compress_part_two(layout):
-    reverse_files = get_files(layout)[::-1]
-    spaces = get_spaces(layout)
-
-    for file in reverse_files:
-        file_start, file_end = file
-        file_len = file_end - file_start
-        for space in spaces:
-            space_start, space_end = space
-            space_len = space_end - space_start
-
-            if file_start < space_start:
-                break
-
-            if file_len <= space_len:
-                for i in range(file_len):
-                    layout[space_start + i] = layout[file_start]
-                    layout[file_end - i - 1] = "."
-
-                # reassign to space list for next iteration
-                space[0] = space_start + file_len
-                break
-
-    return layout
-
-
-def compress(layout, part_two=False):
+from array import array
+from heapq import heapify, heappop, heappush
+from itertools import accumulate
+
+
+def parse_disk(s):
+    """
+    Return the start and length of every run of the disk map, files and
+    free spans alternating, so file i is run 2 * i. Blocks are never
+    expanded, so memory depends on the number of runs only.
+    """
+    lengths = array("q", (digit - 48 for digit in s.strip().encode()))
+    starts = array("q", accumulate(lengths, initial=0))
+    starts.pop()
+    return starts, lengths
+
+
+def range_sum(start, length):
+    # start + (start + 1) + ... + (start + length - 1)
+    return length * (2 * start + length - 1) // 2
+
+
+def compress_blocks(starts, lengths):
+    """
+    Move blocks one at a time from the end of the disk into the leftmost
+    free block, returning the files as (id, start, length) runs.
+    """
+    runs = []
+    last = (len(starts) - 1) // 2
+    remaining = lengths[2 * last]
+    for space in range(1, len(starts), 2):
+        pos, free = starts[space], lengths[space]
+        while free and starts[2 * last] > pos:
+            take = min(free, remaining)
+            if take:
+                runs.append((last, pos, take))
+            pos += take
+            free -= take
+            remaining -= take
+            if not remaining:
+                last -= 1
+                remaining = lengths[2 * last]
+        if starts[2 * last] <= pos:
+            break
+
+    runs += ((f, starts[2 * f], lengths[2 * f]) for f in range(last))
+    runs.append((last, starts[2 * last], remaining))
+    return runs
+
+
+def compress_files(starts, lengths):
+    """
+    Move each whole file, highest id first, into the leftmost free span
+    before it that can hold it, returning (id, start, length) runs.
+
+    Free spans are kept in one min-heap of starts per span length, so the
+    leftmost span that fits is the smallest of at most nine heap tops.
+    What's left of a span after a move goes back on the heap for its new
+    length. Files only move left, so the spans they leave are never used.
+    """
+    spaces = [[] for _ in range(10)]
+    for i in range(1, len(starts), 2):
+        if lengths[i]:
+            spaces[lengths[i]].append(starts[i])
+    for heap in spaces:
+        heapify(heap)
+
+    runs = []
+    for f in range((len(starts) - 1) // 2, -1, -1):
+        start, length = starts[2 * f], lengths[2 * f]
+        best = None
+        for size in range(length, 10):
+            if spaces[size] and spaces[size][0] < start:
+                if best is None or spaces[size][0] < spaces[best][0]:
+                    best = size
+        if best is not None:
+            start = heappop(spaces[best])
+            if best > length:
+                heappush(spaces[best - length], start + length)
+        runs.append((f, start, length))
+    return runs
+
+
+def compress(s, part_two=False):
+    starts, lengths = parse_disk(s)
     if part_two:
-        layout = compress_part_two(layout)
-    else:
-        i = 0
-        j = len(layout) - 1
-        while i < j:
-            if layout[i] == ".":
-                layout[i] = layout[j]
-                layout[j] = "."
-                while layout[j] == ".":
-                    j -= 1
-            i += 1
-    return layout
+        return compress_files(starts, lengths)
+    return compress_blocks(starts, lengths)
 
 
-def get_layout(s):
-    layout = []
-    for i, ch in enumerate(s):
-        if i % 2 == 0:
-            layout += [str(i // 2)] * int(ch)
-        else:
-            layout += ["."] * int(ch)
-    return layout
+def calc_checksum(runs):
+    return sum(f * range_sum(start, length) for f, start, length in runs)
 
 
-def calc_checksum(compressed):
-    return sum(i * int(ch) for i, ch in enumerate(compressed) if ch != ".")
+def fragment(s, part_two=False):
+    return calc_checksum(compress(s, part_two))
 
 
-def fragment(s, part_two=False):
-    layout = get_layout(s)
-    return calc_checksum(compress(layout[:], part_two))
+INPUT = "data/input9.txt"
+
+
+def load(f):
+    return f.read().strip()
+
+
+def part_one(s):
+    return fragment(s)
+
+
+def part_two(s):
+    return fragment(s, True)
 
 
 def main():
-    with open("data/input9.txt") as f:
-        s = f.read()
-        print(f"part 1: {fragment(s)}")
-        print(f"part 2: {fragment(s, True)}")
+    with open(INPUT) as f:
+        s = load(f)
+    print(f"part 1: {part_one(s)}")
+    print(f"part 2: {part_two(s)}")
 
 
 def test_advent_examples():
@@ -102,6 +124,45 @@ def test_advent_examples():
     assert fragment(s, True) == 2858
 
 
+def test_compress_files():
+    import random
+
+    def slow(s):
+        # the leftmost span that fits, found by scanning every span
+        starts, lengths = parse_disk(s)
+        spaces = [[starts[i], lengths[i]] for i in range(1, len(starts), 2)]
+        runs = []
+        for f in range((len(starts) - 1) // 2, -1, -1):
+            start, length = starts[2 * f], lengths[2 * f]
+            for space in spaces:
+                if space[0] >= start:
+                    break
+                if space[1] >= length:
+                    start = space[0]
+                    space[0] += length
+                    space[1] -= length
+                    break
+            runs.append((f, start, length))
+        return calc_checksum(runs)
+
+    rng = random.Random(20)
+    for _ in range(200):
+        s = "".join(
+            str(rng.randrange(1, 10) if i % 2 == 0 else rng.randrange(10))
+            for i in range(rng.randrange(1, 40))
+        )
+        assert fragment(s, True) == slow(s)
+
+
+def test_compress_blocks():
+    # 0..111....22222 -> 022111222......
+    runs = compress("12345")
+    assert sorted(runs) == [(0, 0, 1), (1, 3, 3), (2, 1, 2), (2, 6, 3)]
+    assert calc_checksum(runs) == 60
+    assert fragment("1") == 0
+    assert fragment("10101") == 1 * 1 + 2 * 2
+
+
 if __name__ == "__main__":
     import pytest
     import sys
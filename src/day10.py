@@ -1,76 +1,188 @@
 import sys
 import pytest
 
+import instrument
+from grid import Grid
+from inputs import as_bytes
 
-def get_matrix_and_trailheads(lines):
-    trailheads = []
-    matrix = []
-    rows = len(lines)
-    cols = len(lines[0])
-    [matrix.append([0] * cols) for _ in range(rows)]
-
-    for i, row in enumerate(lines):
-        for j, col in enumerate(row.strip()):
-            if col == "0":
-                trailheads.append((i, j))
-            matrix[i][j] = int(col)
-    return matrix, trailheads
-
-
-def neighbors(matrix, r, c):
-    return [
-        (r + dy, c + dx)
-        for dy, dx in [(-1, 0), (1, 0), (0, 1), (0, -1)]
-        if r + dy >= 0
-        and r + dy < len(matrix)
-        and c + dx >= 0
-        and c + dx < len(matrix[0])
-    ]
+# The summits a cell reaches are a bitset over the 19x19 window centred
+# on it, bit (dr + 9) * WINDOW + dc + 9 for a summit dr rows and dc
+# columns away. Summits are at most 9 steps off, so the set of a
+# neighbour one step (dr, dc) away lines up with the cell's own after a
+# shift by dr * WINDOW + dc, and every set fits in 361 bits however big
+# the map is.
+WINDOW = 19
+CENTRE = 9 * WINDOW + 9
 
 
-def bfs_both(matrix, start, part_two=False):
-    def recurse(matrix, queue, visited, path):
-        if not queue:
-            return 0
+def steps(grid):
+    # (offset to a neighbour, shift of its bitset)
+    return list(zip(grid.offsets4, (-WINDOW, 1, WINDOW, -1)))
 
-        node = queue.pop(0)
-        path.append(node)
-        if not part_two and node in visited or part_two and tuple(path) in visited:
-            return 0
 
-        r, c = node
-        val = matrix[r][c]
-        visited.add(tuple(path) if part_two else node)
+def trails(grid, part_two=False):
+    """
+    Return {trailhead index: value}, where the value is the bitset of the
+    summits it reaches, or with part_two its number of distinct trails.
 
-        if val == 9:
-            return 1
+    Cells are visited a height at a time from 9 down to 0, each layer
+    pushing its values onto its neighbours one lower, so every cell is
+    handled once and only the current layer is kept.
+    """
+    cells = grid.cells
+    moves = steps(grid)
+    layer = dict.fromkeys(grid.find_all("9"), 1 if part_two else 1 << CENTRE)
+    visited = len(layer)
+    for height in b"876543210":
+        below = {}
+        for j, value in layer.items():
+            for o, shift in moves:
+                i = j - o
+                if cells[i] != height:
+                    continue
+                if part_two:
+                    below[i] = below.get(i, 0) + value
+                else:
+                    value_at_i = value << shift if shift > 0 else value >> -shift
+                    below[i] = below.get(i, 0) | value_at_i
+        layer = below
+        visited += len(layer)
+    instrument.count("day10.visited", visited)
+    return layer
 
-        return sum(
-            recurse(matrix, queue + [(nr, nc)], visited, path)
-            for nr, nc in neighbors(matrix, r, c)
-            if matrix[nr][nc] == val + 1
-        )
 
-    return recurse(matrix, [start], set(), [])
+def count_trailheads(grid, part_two=False):
+    found = trails(grid, part_two)
+    if part_two:
+        return sum(found.values())
+    return sum(bits.bit_count() for bits in found.values())
 
 
-def count_trailheads(matrix, trailheads, part_two=False):
-    if part_two:
-        return sum(bfs_both(matrix, t, True) for t in trailheads)
-    return sum(bfs_both(matrix, t) for t in trailheads)
+def reach_from(grid, i):
+    """
+    Return {summit index: number of distinct trails} for the trailhead at
+    index i, climbing from it one height at a time.
+    """
+    cells = grid.cells
+    layer = {i: 1}
+    for height in b"123456789":
+        above = {}
+        for j, n in layer.items():
+            for o in grid.offsets4:
+                if cells[j + o] == height:
+                    above[j + o] = above.get(j + o, 0) + n
+        layer = above
+    return layer
 
 
-def main():
-    with open("data/input10.txt") as f:
-        lines = f.readlines()
+class TrailIndex:
+    """
+    Every trailhead's summits and trail counts, with the reverse map from
+    summits to trailheads, for answering many questions about one map.
+    Cells are given and returned as (row, col).
 
-    m, ths = get_matrix_and_trailheads(lines)
-    print(f"part 1: {count_trailheads(m, ths)}")
-    print(f"part 2: {count_trailheads(m, ths, part_two=True)}")
+    A trail is 9 steps long, so changing a cell's height can only affect
+    the trailheads within 9 steps of it; set_height recomputes just those.
+    """
 
+    def __init__(self, grid):
+        self.grid = grid.copy()
+        self.reach = {}
+        self.reached_by = {}
+        self.totals = [0, 0]
+        for i in self.grid.find_all("0"):
+            self._add(i)
 
-def test_advent_example_part_one():
-    s = """89010123
+    def summits(self, r, c):
+        """
+        The summits reached from the trailhead at (r, c).
+        """
+        found = self.reach.get(self.grid.index(r, c), {})
+        return [self.grid.coords(j) for j in found]
+
+    def trailheads(self, r, c):
+        """
+        The trailheads that can reach the summit at (r, c).
+        """
+        found = self.reached_by.get(self.grid.index(r, c), ())
+        return [self.grid.coords(i) for i in found]
+
+    def trails(self, start, summit):
+        """
+        The number of distinct trails from trailhead start to summit.
+        """
+        found = self.reach.get(self.grid.index(*start), {})
+        return found.get(self.grid.index(*summit), 0)
+
+    def part_one(self):
+        return self.totals[0]
+
+    def part_two(self):
+        return self.totals[1]
+
+    def set_height(self, r, c, height):
+        """
+        Change the height of the cell at (r, c) to a digit 0-9, or to None
+        for a cell no trail can use.
+        """
+        grid = self.grid
+        if not (0 <= r < grid.rows and 0 <= c < grid.cols):
+            raise ValueError(f"({r}, {c}) is outside the map")
+        grid.set(r, c, "." if height is None else str(height))
+
+        zero = ord("0")
+        for dr in range(-9, 10):
+            if not 0 <= r + dr < grid.rows:
+                continue
+            reach = 9 - abs(dr)
+            for cc in range(max(0, c - reach), min(grid.cols, c + reach + 1)):
+                i = grid.index(r + dr, cc)
+                if i in self.reach:
+                    self._remove(i)
+                if grid[i] == zero:
+                    self._add(i)
+
+    def _add(self, i):
+        found = reach_from(self.grid, i)
+        self.reach[i] = found
+        for j in found:
+            self.reached_by.setdefault(j, set()).add(i)
+        self.totals[0] += len(found)
+        self.totals[1] += sum(found.values())
+
+    def _remove(self, i):
+        found = self.reach.pop(i)
+        for j in found:
+            self.reached_by[j].discard(i)
+            if not self.reached_by[j]:
+                del self.reached_by[j]
+        self.totals[0] -= len(found)
+        self.totals[1] -= sum(found.values())
+
+
+INPUT = "data/input10.txt"
+
+
+def load(f):
+    return Grid.from_bytes(as_bytes(f))
+
+
+def part_one(grid):
+    return count_trailheads(grid)
+
+
+def part_two(grid):
+    return count_trailheads(grid, part_two=True)
+
+
+def main():
+    with open(INPUT) as f:
+        grid = load(f)
+    print(f"part 1: {part_one(grid)}")
+    print(f"part 2: {part_two(grid)}")
+
+
+EXAMPLE = """89010123
 78121874
 87430965
 96549874
@@ -78,25 +190,88 @@ def test_advent_example_part_one():
 32019012
 01329801
 10456732"""
-    m, ths = get_matrix_and_trailheads(s.split("\n"))
-    assert len(m) == 8
-    assert len(ths) == 9
-    assert count_trailheads(m, ths) == 36
+
+
+def test_advent_example_part_one():
+    grid = Grid.from_lines(EXAMPLE.split("\n"))
+    assert grid.rows == 8
+    assert len(grid.find_all("0")) == 9
+    assert count_trailheads(grid) == 36
 
 
 def test_advent_example_part_two():
-    s = """89010123
-78121874
-87430965
-96549874
-45678903
-32019012
-01329801
-10456732"""
-    m, ths = get_matrix_and_trailheads(s.split("\n"))
-    assert len(m) == 8
-    assert len(ths) == 9
-    assert count_trailheads(m, ths, part_two=True) == 81
+    grid = Grid.from_lines(EXAMPLE.split("\n"))
+    assert count_trailheads(grid, part_two=True) == 81
+
+
+def test_window_edge():
+    # heights rise with the distance from the centre, so the one trailhead
+    # reaches every cell 9 steps away, at the very edge of the window
+    lines = [
+        "".join(
+            str(d) if (d := abs(r - 9) + abs(c - 9)) < 10 else "." for c in range(19)
+        )
+        for r in range(19)
+    ]
+    grid = Grid.from_lines(lines)
+    assert count_trailheads(grid) == 36
+    # C(9, |dr|) trails to each summit
+    assert count_trailheads(grid, part_two=True) == 4 * 2**9 - 4
+
+
+def test_matches_search():
+    import random
+
+    def search(grid, i):
+        # every trail from i, walked one at a time
+        if grid[i] == ord("9"):
+            return [i]
+        return [
+            end
+            for o in grid.offsets4
+            if grid[i + o] == grid[i] + 1
+            for end in search(grid, i + o)
+        ]
+
+    rng = random.Random(10)
+    for _ in range(20):
+        rows, cols = rng.randint(1, 12), rng.randint(1, 12)
+        lines = [
+            "".join(str((r + c + rng.choice((0, 0, 1))) % 10) for c in range(cols))
+            for r in range(rows)
+        ]
+        grid = Grid.from_lines(lines)
+        ends = [search(grid, i) for i in grid.find_all("0")]
+        assert count_trailheads(grid) == sum(len(set(e)) for e in ends)
+        assert count_trailheads(grid, part_two=True) == sum(map(len, ends))
+
+
+def test_trail_index():
+    import random
+
+    grid = Grid.from_lines(EXAMPLE.split("\n"))
+    index = TrailIndex(grid)
+    assert (index.part_one(), index.part_two()) == (36, 81)
+    assert len(index.summits(0, 2)) == 5
+    assert index.trails((0, 2), (0, 0)) == 0
+    summit = index.summits(0, 2)[0]
+    assert (0, 2) in index.trailheads(*summit)
+    assert sum(index.trails((0, 2), s) for s in index.summits(0, 2)) == 20
+
+    rng = random.Random(22)
+    lines = ["".join(str((r + c) % 10) for c in range(25)) for r in range(25)]
+    grid = Grid.from_lines(lines)
+    index = TrailIndex(grid)
+    for _ in range(100):
+        r, c = rng.randrange(grid.rows), rng.randrange(grid.cols)
+        height = rng.choice([None, *range(10)])
+        index.set_height(r, c, height)
+        grid.set(r, c, "." if height is None else str(height))
+        if rng.random() < 0.1:
+            assert index.part_one() == count_trailheads(grid)
+            assert index.part_two() == count_trailheads(grid, part_two=True)
+    fresh = TrailIndex(grid)
+    assert fresh.reach == index.reach and fresh.reached_by == index.reached_by
 
 
 if __name__ == "__main__":
@@ -1,33 +1,217 @@
 import sys
 import pytest
-from collections import Counter
+from bisect import bisect_right
+from collections import OrderedDict
 
+import instrument
 
-def num_stones_after(stones, round):
-    counts = Counter(stones)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# POWERS[d] is 10**d, enough for any stone a puzzle produces; larger ones
+# fall back to str()
+POWERS = [10**d for d in range(64)]
+
+
+def num_digits(n):
+    """
+    The number of decimal digits of n > 0, without going through str().
+    """
+    if n >= POWERS[-1]:
+        return len(str(n))
+    return bisect_right(POWERS, n)
+
+
+def blink(stone):
+    if stone == 0:
+        return (1,)
+    d = num_digits(stone)
+    if d % 2 == 0:
+        return divmod(stone, POWERS[d // 2])
+    return (stone * 2024,)
+
+
+class TransitionMemo:
+    """
+    A table of stone -> the stones it turns into after one blink, kept
+    across blinks and calls. With maxsize it holds at most that many
+    stones, evicting the least recently used.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.table = {} if maxsize is None else OrderedDict()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def __call__(self, stone):
+        table = self.table
+        found = table.get(stone)
+        if found is not None:
+            self.hits += 1
+            if self.maxsize is not None:
+                table.move_to_end(stone)
+            return found
+        self.misses += 1
+        found = table[stone] = blink(stone)
+        if self.maxsize is not None and len(table) > self.maxsize:
+            table.popitem(last=False)
+        return found
+
+    def clear(self):
+        self.table.clear()
+        self.hits = self.misses = 0
+
+
+MEMO = TransitionMemo()
+
+
+def num_stones_after(stones, round, memo=MEMO):
+    counts = {}
+    for st in stones:
+        counts[st] = counts.get(st, 0) + 1
+    # two dicts swapped each round rather than a new Counter per round
+    updated_counts = {}
+    hits, misses = memo.hits, memo.misses
     for _ in range(round):
-        updated_counts = Counter()
         for st, cnt in counts.items():
-            slen = len(str(st))
-            if st == 0:
-                updates = [1]
-            elif slen % 2 == 0:
-                updates = [int(str(st)[: slen // 2]), int(str(st)[slen // 2 :])]
+            for update in memo(st):
+                updated_counts[update] = updated_counts.get(update, 0) + cnt
+        counts, updated_counts = updated_counts, counts
+        updated_counts.clear()
+    instrument.count("day11.memo_hits", memo.hits - hits)
+    instrument.count("day11.memo_misses", memo.misses - misses)
+    return sum(counts.values())
+
+
+def mulmod(a, b, m):
+    """
+    a @ b % m for int64 arrays with entries below m < 2**31, exactly.
+
+    BLAS float64 products are exact up to 2**53, so b is split into
+    pieces of a few bits, small enough that no sum of products can pass
+    that, and the pieces' products are recombined mod m.
+    """
+    bits = 53 - (a.shape[-1] * m).bit_length()
+    if bits < 1:
+        raise ValueError(f"modulus {m} is too large for {a.shape[-1]} states")
+    af = a.astype(np.float64)
+    out = np.zeros((a.shape[0], b.shape[1]), dtype=np.int64)
+    for shift in range(0, m.bit_length(), bits):
+        piece = ((b >> shift) & ((1 << bits) - 1)).astype(np.float64)
+        part = np.fmod(af @ piece, m).astype(np.int64)
+        out = (out + part * pow(2, shift, m)) % m
+    return out
+
+
+class StoneMatrix:
+    """
+    Blinking as a matrix, for stone counts at huge blink numbers.
+
+    The stones reachable from a starting set settle into a closed set of
+    a few thousand values. T[i, j] is how many stones j a stone i turns
+    into, so the counts after n blinks are the starting counts times
+    T**n, which repeated squaring reaches in O(log n) matrix products.
+    The squares T**(2**k) are kept, so further blink numbers only cost
+    vector products.
+
+    Counts are exact Python ints by default, which costs K**3 big int
+    operations per product for K states and grows with n (the count has
+    about 0.6 * n bits), so it's for closed sets and blink numbers of
+    modest size. With a modulus below 2**31 products go through float64
+    BLAS instead and any n works, 10**12 included.
+    """
+
+    def __init__(self, stones, memo=MEMO, max_states=1 << 14):
+        self.states = list(dict.fromkeys(stones))
+        index = {st: i for i, st in enumerate(self.states)}
+        edges = []
+        for i, st in enumerate(self.states):
+            for update in memo(st):
+                if update not in index:
+                    if len(self.states) == max_states:
+                        raise ValueError(
+                            f"the stones don't settle into {max_states} values"
+                        )
+                    index[update] = len(self.states)
+                    self.states.append(update)
+                edges.append((i, index[update]))
+        self.edges = np.array(edges, dtype=np.intp).reshape(-1, 2)
+        self.start = np.zeros(len(self.states), dtype=np.int64)
+        np.add.at(self.start, [index[st] for st in stones], 1)
+        self.squares = {}
+
+    def __len__(self):
+        return len(self.states)
+
+    def matrix(self, dtype=None):
+        k = len(self.states)
+        t = np.zeros((k, k), dtype=np.int64)
+        np.add.at(t, (self.edges[:, 0], self.edges[:, 1]), 1)
+        return t.astype(np.int64 if dtype is None else dtype)
+
+    def square(self, bit, modulus=None):
+        """
+        T**(2**bit), exact or mod modulus.
+        """
+        squares = self.squares.setdefault(modulus, [])
+        if not squares:
+            t = self.matrix(object if modulus is None else np.int64)
+            squares.append(t if modulus is None else t % modulus)
+        while len(squares) <= bit:
+            last = squares[-1]
+            if modulus is None:
+                squares.append(last.dot(last))
             else:
-                updates = [st * 2024]
+                squares.append(mulmod(last, last, modulus))
+        return squares[bit]
 
-            for update in updates:
-                updated_counts[update] += cnt
+    def count(self, n, modulus=None):
+        return self.counts([n], modulus)[0]
+
+    def counts(self, ns, modulus=None):
+        """
+        The number of stones after each of the blink numbers ns.
+        """
+        found = []
+        for n in ns:
+            if modulus is None:
+                v = self.start.astype(object)[None, :]
+            else:
+                v = self.start[None, :] % modulus
+            for bit in range(n.bit_length()):
+                if n >> bit & 1:
+                    t = self.square(bit, modulus)
+                    v = v.dot(t) if modulus is None else mulmod(v, t, modulus)
+            total = int(v.sum())
+            found.append(total if modulus is None else total % modulus)
+        return found
+
+
+INPUT = "data/input11.txt"
+
+
+def load(f):
+    return [int(stone) for stone in f.read().strip().split()]
 
-        counts = updated_counts
-    return sum(counts.values())
+
+def part_one(stones):
+    return num_stones_after(stones, 25)
+
+
+def part_two(stones):
+    return num_stones_after(stones, 75)
 
 
 def main():
-    with open("data/input11.txt") as f:
-        stones = [int(stone) for stone in f.read().strip().split()]
-        print(f"part 1: {num_stones_after(stones, 25)}")
-        print(f"part 2: {num_stones_after(stones, 75)}")
+    with open(INPUT) as f:
+        stones = load(f)
+    print(f"part 1: {part_one(stones)}")
+    print(f"part 2: {part_two(stones)}")
 
 
 def test_blink():
@@ -40,6 +224,48 @@ def test_blink():
     assert num_stones_after(stones, 6) == 22
 
 
+def test_num_digits():
+    for n in [1, 9, 10, 99, 100, 12345, 10**63 - 1, 10**63, 10**70 + 3]:
+        assert num_digits(n) == len(str(n))
+    assert blink(1000) == (10, 0)
+    assert blink(99) == (9, 9)
+    assert blink(0) == (1,) and blink(5) == (10120,)
+
+
+def test_memo():
+    memo = TransitionMemo(maxsize=10)
+    assert num_stones_after([125, 17], 25, memo) == 55312
+    assert len(memo) == 10
+    assert num_stones_after([125, 17], 25) == 55312
+    hits = MEMO.hits
+    assert num_stones_after([125, 17], 25) == 55312
+    assert MEMO.misses and MEMO.hits > hits
+
+
+@pytest.mark.skipif(np is None, reason="needs numpy")
+def test_stone_matrix():
+    stones = StoneMatrix([125, 17])
+    assert len(stones) < 100
+    ns = [0, 1, 6, 25, 75, 200]
+    assert stones.counts(ns) == [num_stones_after([125, 17], n) for n in ns]
+
+    m = 1_000_000_007
+    exact = stones.count(1000)
+    assert stones.count(1000, m) == exact % m
+    # T**(10**12) from T**(10**12 - 1000) and T**1000 agree
+    big = stones.count(10**12, m)
+    assert 0 <= big < m
+    v = stones.start[None, :] % m
+    for n in (10**12 - 1000, 1000):
+        for bit in range(n.bit_length()):
+            if n >> bit & 1:
+                v = mulmod(v, stones.square(bit, m), m)
+    assert int(v.sum()) % m == big
+
+    with pytest.raises(ValueError):
+        StoneMatrix([125, 17], max_states=10)
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         pytest.main(["-xvvs", __file__])
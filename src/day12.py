@@ -1,127 +1,113 @@
-from collections import defaultdict
 import sys
+from typing import NamedTuple
+
 import pytest
 
+from grid import Grid
+from inputs import Input, as_bytes
 
-def get_neighbors(grid, ch, r, c):
-    return [
-        (new_r, new_c)
-        for new_r, new_c in [(r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)]
-        if len(grid) > new_r >= 0
-        and len(grid[0]) > new_c >= 0
-        and grid[new_r][new_c] == ch
-    ]
 
+class Region(NamedTuple):
+    plant: str
+    area: int
+    perimeter: int
+    # a polygon has as many sides as corners
+    sides: int
 
-def flip_island(grid, start):
+
+def label_regions(grid):
     """
-    Find points in grid that match the character at grid[start] and are
-    connected either vertically or horizontally. Flip each of these character
-    to "-" so that we don't double-process a certain grid point.
+    Return the Regions of the grid, found in one raster scan with
+    union-find, without changing the grid.
+
+    Each cell joins the region of its left and upper neighbours when they
+    hold the same plant, merging the two regions if both do. Area,
+    perimeter and corners are added to a cell's region as it's scanned
+    and summed into the root whenever two regions merge. A cell adds 4 to
+    the perimeter less 2 for each matching neighbour already scanned
+    (their shared edge was counted from both sides), and a corner for
+    each diagonal where both sides differ from it (an outer corner) or
+    both match but the diagonal cell doesn't (an inner one).
     """
-    r, c = start
-    ch = grid[r][c]
-
-    perimeter = 0
-    group = set()
-    queue = [start]
-    while queue:
-        node = queue.pop(0)
-        nr, nc = node
-        if node in group or grid[nr][nc] != ch:
-            continue
-
-        group.add(node)
-        neighbors = get_neighbors(grid, ch, nr, nc)
-        perimeter += 4 - len(neighbors)
-        for n in neighbors:
-            queue.append(n)
+    cells = grid.cells
+    s = grid.stride
+    n, e, south, w = grid.offsets4
+    diagonals = [(n, e), (e, south), (south, w), (w, n)]
+
+    labels = [0] * len(cells)
+    parent, plant, area, perimeter, corners = [], [], [], [], []
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i in grid.indices():
+        ch = cells[i]
+        up = cells[i - s] == ch
+        left = cells[i - 1] == ch
+        if left:
+            label = find(labels[i - 1])
+            if up:
+                other = find(labels[i - s])
+                if other != label:
+                    parent[other] = label
+                    area[label] += area[other]
+                    perimeter[label] += perimeter[other]
+                    corners[label] += corners[other]
+        elif up:
+            label = find(labels[i - s])
+        else:
+            label = len(parent)
+            parent.append(label)
+            plant.append(chr(ch))
+            area.append(0)
+            perimeter.append(0)
+            corners.append(0)
+        labels[i] = label
+
+        area[label] += 1
+        perimeter[label] += 4 - 2 * (up + left)
+        for a, b in diagonals:
+            same_a, same_b = cells[i + a] == ch, cells[i + b] == ch
+            if same_a == same_b and (not same_a or cells[i + a + b] != ch):
+                corners[label] += 1
 
-    # flip them so we don't process them in a future iteration
-    for ptr, ptc in group:
-        grid[ptr][ptc] = "-"
+    return [
+        Region(plant[x], area[x], perimeter[x], corners[x])
+        for x in range(len(parent))
+        if parent[x] == x
+    ]
 
-    return list(group), perimeter
 
+def calc_price(grid, part_two=False):
+    regions = label_regions(grid)
+    if part_two:
+        return sum(r.area * r.sides for r in regions)
+    return sum(r.area * r.perimeter for r in regions)
 
-def detect_plots(grid):
-    """
-    Iterate over each x,y co-ordinate and flood outwards to find all
-    neighboring co-ordinates that are connected. Return a list of each
-    point in a group and the groups perimeter.
-    """
-    num_rows = len(grid)
-    num_cols = len(grid[0])
 
-    groupings = []
-    for r in range(num_rows):
-        for c in range(num_cols):
-            ch = grid[r][c]
-            if ch == "-":
-                continue
-            groupings.append(flip_island(grid, (r, c)))
-    return groupings
+INPUT = "data/input12.txt"
 
 
-def parse_grid(lines):
-    matrix = [[0] * len(lines[0]) for _ in range(len(lines))]
-    for i, line in enumerate(lines):
-        for j, ch in enumerate(line.strip()):
-            matrix[i][j] = ch
-    return matrix
+def load(f):
+    return Grid.from_bytes(as_bytes(f))
 
 
-def count_sides(points):
-    """
-    Given a group of points, return the number of sides
-    on the shape that that groups creates.
-    """
-    sides = defaultdict(set)
-    points = set(points)
-    for r, c in points:
-        if (r, c - 1) not in points:  # left side
-            sides[(None, c)].add((r, c))
-        if (r, c + 1) not in points:  # right side
-            sides[(None, c + 1)].add((r, c))
-        if (r - 1, c) not in points:  # up side
-            sides[(r, None)].add((r, c))
-        if (r + 1, c) not in points:  # down side
-            sides[(r + 1, None)].add((r, c))
-
-    # calculate the one-dimensional distance between two points
-    def distance(a, b):
-        return abs(b[0] - a[0]) + abs(b[1] - a[1])
-
-    total = 0
-    total = len(sides)
-    for pts in sides.values():
-        pts = sorted(list(pts))
-        for i in range(1, len(pts)):
-            # if points are connected by a distance of 1 then they
-            # are considered the same side. Any more and they're
-            # a completely new side.
-            if distance(pts[i - 1], pts[i]) > 1:
-                total += 1
-    return total
+def part_one(grid):
+    return calc_price(grid)
 
 
-def calc_price(grid, part_two=False):
-    groupings = detect_plots(grid)
-    if part_two:
-        return sum(len(grp) * count_sides(grp) for grp, _ in groupings)
-    return sum(len(grp) * perim for grp, perim in groupings)
+def part_two(grid):
+    return calc_price(grid, True)
 
 
 def main():
-    with open("data/input12.txt") as f:
-        lines = [ln.strip() for ln in f]
-        grid = parse_grid(lines)
-        print(f"part 1: {calc_price(grid)}")
-
-    with open("data/input12.txt") as f:
-        lines = [ln.strip() for ln in f]
-        grid = parse_grid(lines)
-        print(f"part 2: {calc_price(grid, True)}")
+    with Input.open(INPUT) as f:
+        grid = load(f)
+    print(f"part 1: {part_one(grid)}")
+    print(f"part 2: {part_two(grid)}")
 
 
 def test_part_one():
@@ -136,11 +122,36 @@ VVIIICJJEE
 MIIIIIJJEE
 MIIISIJEEE
 MMMISSJEEE"""
-    grid = parse_grid(s.split("\n"))
+    grid = Grid.from_lines(s.split("\n"))
+    cells = bytes(grid.cells)
     assert calc_price(grid) == 1930
-
-    grid = parse_grid(s.split("\n"))
     assert calc_price(grid, True) == 1206
+    assert grid.cells == cells
+
+
+def test_regions():
+    # an E whose arms meet in a U-turn, and a hole with an island in it
+    s = """\
+EEEEE
+EXXXX
+EEEEE
+EXXXX
+EEEEE"""
+    regions = label_regions(Grid.from_lines(s.split("\n")))
+    assert sorted(regions) == [
+        Region("E", 17, 36, 12),
+        Region("X", 4, 10, 4),
+        Region("X", 4, 10, 4),
+    ]
+
+    s = """\
+AAAAAA
+AAABBA
+AAABBA
+ABBAAA
+ABBAAA
+AAAAAA"""
+    assert calc_price(Grid.from_lines(s.split("\n")), True) == 368
 
 
 if __name__ == "__main__":
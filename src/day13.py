@@ -36,15 +36,26 @@ def parse_input(s):
     return nums
 
 
+INPUT = "data/input13.txt"
+
+
+def load(f):
+    return parse_input(f.read().strip())
+
+
+def part_one(nums):
+    return sum(solve(n) for n in nums)
+
+
+def part_two(nums):
+    return sum(solve(n, part_two=True) for n in nums)
+
+
 def main():
-    with open("data/input13.txt") as f:
-        nums = parse_input(f.read().strip())
-        answers = [solve(n) for n in nums]
-        print(f"part 1: {sum(answers)}")
-    with open("data/input13.txt") as f:
-        nums = parse_input(f.read().strip())
-        answers = [solve(n, part_two=True) for n in nums]
-        print(f"part 2: {sum(answers)}")
+    with open(INPUT) as f:
+        nums = load(f)
+    print(f"part 1: {part_one(nums)}")
+    print(f"part 2: {part_two(nums)}")
 
 
 def test_advent_of_code_example():
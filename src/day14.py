@@ -1,7 +1,9 @@
 import math
 import re
 from collections import Counter
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+
+from inputs import Input, as_bytes
 
 
 @dataclass
@@ -45,9 +47,9 @@ def display(counts, f=None):
     print(file=f)
 
 
-def solve(lines):
+def solve(robots):
     final_positions = []
-    for robot in parse_robots(lines):
+    for robot in robots:
         fx = (robot.px + 100 * robot.vx) % WIDTH
         fy = (robot.py + 100 * robot.vy) % HEIGHT
         if fx != MID_WIDTH and fy != MID_HEIGHT:
@@ -87,20 +89,35 @@ def simulate(robots: list[Robot], write_to_file=False):
     return easter_egg_frame
 
 
-def parse_robots(lines):
-    robots = []
-    for line in lines:
-        nums = [int(n) for n in re.findall(r"(-?\d+)", line)]
-        robots.append(Robot(*nums))
-    return robots
+def parse_robots(data):
+    """
+    Pull the robots straight out of the raw bytes, four numbers each.
+    """
+    nums = (int(m[0]) for m in re.finditer(rb"-?\d+", data))
+    return [Robot(*robot) for robot in zip(nums, nums, nums, nums)]
 
 
-def main():
-    with open("data/input14.txt") as f:
-        s = f.read().split("\n")
+INPUT = "data/input14.txt"
+
+
+def load(f):
+    return parse_robots(as_bytes(f))
+
 
-    print(f"part 1: {solve(s)}")
-    print(f"part 2: {simulate(parse_robots(s))}")
+def part_one(robots):
+    return solve(robots)
+
+
+def part_two(robots):
+    # simulate moves the robots in place
+    return simulate([replace(r) for r in robots])
+
+
+def main():
+    with Input.open(INPUT) as f:
+        robots = load(f)
+    print(f"part 1: {part_one(robots)}")
+    print(f"part 2: {part_two(robots)}")
 
 
 if __name__ == "__main__":
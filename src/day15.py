@@ -240,24 +240,34 @@ def part_two(data):
     )
 
 
-def main():
+INPUT = "data/input15.txt"
+
+
+def load(f):
+    return f.read()
+
+
+def part_one(data):
     grid_lines = []
     move_lines = []
-    with open("data/input15.txt") as f:
-        for line in f:
-            if "#" in line:
-                grid_lines.append(line.strip())
-            elif line[0] in Direction:
-                move_lines.append(line.strip())
+    for line in data.split("\n"):
+        if "#" in line:
+            grid_lines.append(line.strip())
+        elif line and line[0] in Direction:
+            move_lines.append(line.strip())
 
     moves = parse_moves("".join(move_lines))
     mat, robot = parse_grid(grid_lines)
 
     grid = simulate(mat, robot, moves)
-    print(f"part 1: {calculate_gps_sum(grid)}")
+    return calculate_gps_sum(grid)
+
 
-    with open("data/input15.txt") as f:
-        print(f"part 2: {part_two(f.read())}")
+def main():
+    with open(INPUT) as f:
+        data = load(f)
+    print(f"part 1: {part_one(data)}")
+    print(f"part 2: {part_two(data)}")
 
 
 def test_move_left():
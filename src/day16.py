@@ -1,7 +1,9 @@
 import pytest
 import sys
 from math import inf
-from heapq import heappush, heappop
+from grid import Grid
+from inputs import Input, lines
+from search import UNREACHED, dial
 
 DIRS = {
     "N": (-1, 0),
@@ -10,82 +12,103 @@ DIRS = {
     "W": (0, -1),
 }
 ORDER = list(DIRS.keys())
+TURN_COST = 1000
+
+
+def reindeer_edges(maze, reverse=False):
+    """
+    Edges between reindeer states, numbered cell index * 4 + direction
+    where directions index ORDER (which matches the grid's offsets4).
+    Reversed edges lead to the states a state can be reached from.
+    """
+    offsets = maze.offsets4
+    cells = maze.cells
+    wall = ord("#")
+
+    def edges(u):
+        pos, d = divmod(u, 4)
+        step = -offsets[d] if reverse else offsets[d]
+        turns = [(pos * 4 + (d + 1) % 4, TURN_COST), (pos * 4 + (d - 1) % 4, TURN_COST)]
+        if cells[pos + step] != wall:
+            turns.append((u + 4 * step, 1))
+        return turns
+
+    return edges
 
 
 def find_paths(maze, start, end):
-    visited = {}
-    q = []
-    highscore = inf
-    paths = []
-
-    heappush(q, (0, start, "E", ""))
-    while q:
-        score, pos, d, path = heappop(q)
-        if score > highscore:
-            break
-        if (pos, d) in visited and visited[(pos, d)] < score:
-            continue
-        visited[(pos, d)] = score
-        if pos == end:
-            highscore = score
-            paths.append(path)
-
-        posy, posx = pos
-        dy, dx = DIRS[d]
-        if maze[posy + dy][posx + dx] != "#":
-            heappush(q, (score + 1, (posy + dy, posx + dx), d, path + "F"))
-
-        next_direction = ORDER[(ORDER.index(d) + 1) % len(ORDER)]
-        heappush(q, (score + 1000, pos, next_direction, path + "R"))
-        next_direction = ORDER[(ORDER.index(d) - 1) % len(ORDER)]
-        heappush(q, (score + 1000, pos, next_direction, path + "L"))
-
-    return paths, highscore
+    """
+    Return the scores of the reindeer states along with the lowest score
+    from start to end. The search stops once the end is reached, which
+    still leaves every state scoring at most that much with its exact
+    score since all moves cost something.
+    """
+    end = maze.index(*end)
+    result = dial(
+        4 * len(maze.cells),
+        [maze.index(*start) * 4 + ORDER.index("E")],
+        reindeer_edges(maze),
+        TURN_COST,
+        goal=lambda u: u // 4 == end,
+    )
+    if result.goal is None:
+        return result.dist, inf
+    return result.dist, result.dist[result.goal]
+
+
+def best_path_tiles(maze, start, end):
+    """
+    Return the tiles on any of the lowest scoring paths, found by walking
+    back from the end over the moves whose scores add up exactly.
+    """
+    scores, highscore = find_paths(maze, start, end)
+    if highscore == inf:
+        return set()
+
+    end = maze.index(*end)
+    backwards = reindeer_edges(maze, reverse=True)
+    stack = [end * 4 + d for d in range(4) if scores[end * 4 + d] == highscore]
+    seen = set(stack)
+    while stack:
+        v = stack.pop()
+        for u, w in backwards(v):
+            if u not in seen and scores[u] != UNREACHED and scores[u] + w == scores[v]:
+                seen.add(u)
+                stack.append(u)
+
+    return {maze.coords(u // 4) for u in seen}
 
 
 def matrix(lines):
-    m = []
-    start = None
-    end = None
-    for r, line in enumerate(lines):
-        row = []
-        for c, ch in enumerate(line):
-            if ch == "E":
-                end = (r, c)
-            if ch == "S":
-                start = (r, c)
-            row.append(ch)
-        m.append(row)
+    m = Grid.from_lines(lines, border=b"#")
+    start = m.coords(m.find("S"))
+    end = m.coords(m.find("E"))
     return m, start, end
 
 
-def count_tiles(paths, start):
-    tiles = set([start])
-    for path in paths:
-        posx, posy = start
-        direction = "E"
-        for d in path:
-            if d == "F":
-                dx, dy = DIRS[direction]
-                posx = posx + dx
-                posy = posy + dy
-                tiles.add((posx, posy))
-            if d == "L":
-                direction = ORDER[(ORDER.index(direction) - 1) % len(ORDER)]
-            elif d == "R":
-                direction = ORDER[(ORDER.index(direction) + 1) % len(ORDER)]
-    return tiles
+INPUT = "data/input16.txt"
 
 
-def main():
-    with open("data/input16.txt") as f:
-        lines = f.read().split("\n")
-        m, start, end = matrix(lines)
+def load(f):
+    return matrix(lines(f))
 
-    paths, score = find_paths(m, start, end)
-    print(f"part 1: {score}")
 
-    print(f"part 2: {len(count_tiles(paths, start))}")
+def part_one(data):
+    m, start, end = data
+    _, score = find_paths(m, start, end)
+    return score
+
+
+def part_two(data):
+    m, start, end = data
+    return len(best_path_tiles(m, start, end))
+
+
+def main():
+    with Input.open(INPUT) as f:
+        data = load(f)
+    print(f"part 1: {part_one(data)}")
+    print(f"part 2: {part_two(data)}")
 
 
 def test_advent_part_one_examples():
@@ -105,18 +128,18 @@ def test_advent_part_one_examples():
 #S..#.....#...#
 ###############"""
 
-    m, start, end, barriers = matrix(s.split("\n"))
+    m, start, end = matrix(s.split("\n"))
     assert len(m) == 15
-    assert len(m[0]) == 15
+    assert m.cols == 15
     assert start == (13, 1)
     assert end == (1, 13)
-    assert len(barriers) == s.count("#")
-    assert m[1][13] == "E"
-    assert m[13][1] == "S"
+    assert sum(ln.count("#") for ln in m.lines()) == s.count("#")
+    assert m.get(1, 13) == "E"
+    assert m.get(13, 1) == "S"
 
-    graph = Graph(len(m), len(m[0]), barriers)
-    path, cost = a_star(start, end, graph)
+    _, cost = find_paths(m, start, end)
     assert cost == 7036
+    assert len(best_path_tiles(m, start, end)) == 45
 
     s = """#################
 #...#...#...#..E#
@@ -135,10 +158,10 @@ def test_advent_part_one_examples():
 #.#.#.#########.#
 #S#.............#
 #################"""
-    m, start, end, barriers = matrix(s.split("\n"))
-    graph = Graph(len(m), len(m[0]), barriers)
-    path, cost = a_star(start, end, graph)
+    m, start, end = matrix(s.split("\n"))
+    _, cost = find_paths(m, start, end)
     assert cost == 11048
+    assert len(best_path_tiles(m, start, end)) == 64
 
 
 if __name__ == "__main__":
@@ -1,72 +1,44 @@
+import re
 import sys
 import pytest
-from heapq import heappush, heappop
 from math import inf
+from grid import Grid
+from inputs import Input, as_bytes
+from search import bfs, grid_neighbors
 
 
 class ProgramSpace:
     def __init__(self, n, barriers):
         self.dim = n
-        self.m = [["." for _ in range(n)] for _ in range(n)]
-        self.barriers = dict.fromkeys(barriers)
+        # the border of the grid is corrupted too so nothing walks off it
+        self.grid = Grid(n, n, border=b"#")
+        self.barriers = list(dict.fromkeys(barriers))
         self.num_dropped = 0
+        self.neighbors = grid_neighbors(self.grid, ".")
+
+    @property
+    def m(self):
+        return self.grid.lines()
 
     def drop(self, n):
-        all_barriers = list(self.barriers.keys())
-        to_drop = all_barriers[self.num_dropped : self.num_dropped + n]
+        to_drop = self.barriers[self.num_dropped : self.num_dropped + n]
         self.num_dropped += n
         for x, y in to_drop:
-            self.m[y][x] = "#"
-
-    def _reconstruct(self, d, start, pt):
-        path = []
-        while pt != start:
-            path.append(pt)
-            pt = d[pt]
-        path.append(start)
-        path.reverse()
-        return path
+            self.grid.set(y, x, "#")
 
     def shortest_path(self):
         """
-        Calculate shortest path using Djikstra's and return
-        the cost and the path with that cost.
+        Calculate shortest path with a breadth first search and
+        return the cost and the path with that cost.
         """
-        start = (0, 0)
-        end = (self.dim - 1, self.dim - 1)
-
-        # the priorty queue of nodes to explore by minimum cost
-        pq = []
-        heappush(pq, (0, start))
-
-        visited = set()
-        costs = {start: 0}
-        came_from = {}
-
-        while pq:
-            current_cost, (x, y) = heappop(pq)
-            if (x, y) == end:
-                #     path = []
-                #     while (x, y) != start:
-                #         path.append((x, y))
-                #         x, y = came_from[(x, y)]
-                #     path.append(start)
-                #     path.reverse()
-                return current_cost, self._reconstruct(came_from, start, (x, y))
-            if (x, y) in visited:
-                continue
-
-            visited.add((x, y))
-            for dx, dy in [(0, -1), (0, 1), (1, 0), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.dim and 0 <= ny < self.dim and self.m[ny][nx] == ".":
-                    new_cost = current_cost + 1
-                    if (nx, ny) not in costs or new_cost < costs[(nx, ny)]:
-                        costs[(nx, ny)] = new_cost
-                        came_from[(nx, ny)] = (x, y)
-                        heappush(pq, (new_cost, (nx, ny)))
-
-        return inf, None
+        start = self.grid.index(0, 0)
+        end = self.grid.index(self.dim - 1, self.dim - 1)
+
+        result = bfs(len(self.grid.cells), [start], self.neighbors, goal=end)
+        if result.goal is None:
+            return inf, None
+        path = [self.grid.coords(i)[::-1] for i in result.path()]
+        return result.dist[end], path
 
     def display_path(self, path):
         path = set(path)
@@ -76,7 +48,7 @@ class ProgramSpace:
                 if (x, y) in path:
                     ch = "O"
                 else:
-                    ch = self.m[y][x]
+                    ch = self.grid.get(y, x)
                 print(ch, end="")
             print()
 
@@ -84,41 +56,78 @@ class ProgramSpace:
 def find_first_blocker(n, skip, falling_bytes):
     """
     Find the first byte that blocks all paths to the exit. Start
-    with 1024 as a known amount of bytes with a clear exit. Then
-    add a single byte at a time. If the byte was in the previous
-    path then it could potentially be a blocker. Recompute the
-    path to see if this is the case. If so, return that byte
+    with skip as an amount of bytes expected to leave a clear exit,
+    or from no bytes at all if it doesn't. Then add a single byte
+    at a time. If the byte was in the previous path then it could
+    potentially be a blocker. Recompute the path to see if this is
+    the case. If so, return that byte
     """
     ps = ProgramSpace(n, falling_bytes)
     ps.drop(skip)
     num_dropped = skip
 
     cost, path = ps.shortest_path()
+    if path is None:
+        return find_first_blocker(n, 0, falling_bytes)
+    path = set(path)
     for b in falling_bytes[num_dropped:]:
         ps.drop(1)
         if b in path:
             cost, path = ps.shortest_path()
             if cost == inf:
                 return b
+            path = set(path)
 
     raise Exception("Blocking byte not found...")
 
 
-def main():
-    with open("data/input18.txt") as f:
-        falling_bytes = []
-        for ln in f:
-            x, y = ln.split(",")
-            falling_bytes.append((int(x), int(y)))
+INPUT = "data/input18.txt"
+# bytes dropped before part one looks for a path in the puzzle's 71x71 space
+FIRST_DROP = 1024
+
+
+def dimension(falling_bytes):
+    """
+    The memory space is square and every cell but the corners
+    eventually gets corrupted, so its size follows from the input.
+    """
+    return max(max(x, y) for x, y in falling_bytes) + 1
 
-    ps = ProgramSpace(71, falling_bytes)
-    ps.drop(1024)
 
+def first_drop(n, falling_bytes):
+    """
+    FIRST_DROP for the puzzle's memory space, and a fifth of the bytes
+    for other sizes, as FIRST_DROP would fill most of a small one.
+    """
+    return FIRST_DROP if n == 71 else len(falling_bytes) // 5
+
+
+def load(f):
+    nums = (int(m[0]) for m in re.finditer(rb"\d+", as_bytes(f)))
+    return list(zip(nums, nums))
+
+
+def part_one(falling_bytes):
+    n = dimension(falling_bytes)
+    ps = ProgramSpace(n, falling_bytes)
+    ps.drop(first_drop(n, falling_bytes))
     cost, _ = ps.shortest_path()
-    print(f"part 1: {cost}")
+    if cost == inf:
+        raise ValueError(f"no path to the exit after {ps.num_dropped} bytes")
+    return cost
 
-    b = find_first_blocker(71, 1024, falling_bytes)
-    print(f"part 2: {b[0]},{b[1]}")
+
+def part_two(falling_bytes):
+    n = dimension(falling_bytes)
+    b = find_first_blocker(n, first_drop(n, falling_bytes), falling_bytes)
+    return f"{b[0]},{b[1]}"
+
+
+def main():
+    with Input.open(INPUT) as f:
+        falling_bytes = load(f)
+    print(f"part 1: {part_one(falling_bytes)}")
+    print(f"part 2: {part_two(falling_bytes)}")
 
 
 @pytest.fixture
@@ -150,6 +159,22 @@ def test_drop_bytes_subsequently(barriers):
 
 def test_advent_example_part_two(barriers):
     assert find_first_blocker(7, 12, barriers) == (6, 1)
+    # the exit is already cut off after the first 22 bytes
+    assert find_first_blocker(7, 22, barriers) == (6, 1)
+
+
+def test_small_space(barriers):
+    assert first_drop(7, barriers) == 5
+    assert part_one(barriers) == 12
+    assert part_two(barriers) == "6,1"
+
+    # a wall across the space falls first
+    walled = [(x, 3) for x in range(7)]
+    walled += [(x, y) for y in range(7) for x in range(7) if y != 3]
+    walled = [b for b in walled if b not in ((0, 0), (6, 6))]
+    with pytest.raises(ValueError, match="no path"):
+        part_one(walled)
+    assert part_two(walled) == "6,3"
 
 
 if __name__ == "__main__":
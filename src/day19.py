@@ -53,15 +53,31 @@ def count_combinations(patterns, towels):
     return sum(find_combos_dp(p, towels) for p in patterns)
 
 
-def main():
-    with open("data/input19.txt") as f:
-        data = f.read()
+INPUT = "data/input19.txt"
+
 
+def load(f):
+    data = f.read()
     towels = data.split("\n\n")[0].strip().split(", ")
     patterns = data.split("\n\n")[1].strip().split("\n")
+    return towels, patterns
+
+
+def part_one(data):
+    towels, patterns = data
+    return count_num_possible(patterns, towels)
 
-    print(f"part 1: {count_num_possible(patterns, towels)}")
-    print(f"part 2: {count_combinations(patterns, towels)}")
+
+def part_two(data):
+    towels, patterns = data
+    return count_combinations(patterns, towels)
+
+
+def main():
+    with open(INPUT) as f:
+        data = load(f)
+    print(f"part 1: {part_one(data)}")
+    print(f"part 2: {part_two(data)}")
 
 
 def test_example_part_one():
@@ -1,68 +1,37 @@
 import sys
 import pytest
 from collections import defaultdict
-from heapq import heappop, heappush
 from math import inf
-
-
-def reconstruct(d, n, start, end):
-    path = []
-    while n in d:
-        path.append(n)
-        n = d[n]
-    path.append(start)
-    return list(reversed(path))
+from grid import Grid
+from inputs import Input, as_bytes
+from search import dijkstra, grid_neighbors
 
 
 def astar(grid, start, end):
-    def manhattan(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    rows, cols = len(grid), len(grid[0])
-    open_set = []
-    heappush(open_set, (0, start))
-
-    came_from = {}
-    g_score = {start: 0}
-    f_score = {start: manhattan(start, end)}
-
-    while open_set:
-        score, current = heappop(open_set)
+    ey, ex = divmod(grid.index(*end), grid.stride)
 
-        if current == end:
-            return (score, reconstruct(came_from, current, start, end))
+    def manhattan(a):
+        ay, ax = divmod(a, grid.stride)
+        return abs(ay - ey) + abs(ax - ex)
 
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # N, S, W, E
-            neighbor = (current[0] + dx, current[1] + dy)
-            ny, nx = neighbor
-            if 0 <= ny < rows and 0 <= nx < cols:
-                if grid[ny][nx] == "#":
-                    continue
+    neighbors = grid_neighbors(grid, ".SE")
+    result = dijkstra(
+        len(grid.cells),
+        [grid.index(*start)],
+        lambda u: [(v, 1) for v in neighbors(u)],
+        goal=grid.index(*end),
+        heuristic=manhattan,
+    )
+    if result.goal is None:
+        return inf, []
+    return result.dist[result.goal], [grid.coords(i) for i in result.path()]
 
-                tentative_g_score = g_score[current] + 1
 
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + manhattan(neighbor, end)
-                    heappush(open_set, (f_score[neighbor], neighbor))
-
-    return inf, []
-
-
-def parse(s):
-    m = []
-    start = None
-    for r, row in enumerate(s.split("\n")):
-        mr = []
-        for c, ch in enumerate(row):
-            if ch == "S":
-                start = (r, c)
-            elif ch == "E":
-                end = (r, c)
-            mr.append(ch)
-        m.append(mr)
-    return m, start, end
+def parse(data):
+    if isinstance(data, str):
+        data = data.encode()
+    m = Grid.from_bytes(data, border=b"#")
+    return m, m.coords(m.find("S")), m.coords(m.find("E"))
 
 
 def find_savings(m, start, end, max_distance=2):
@@ -92,14 +61,30 @@ def find_savings(m, start, end, max_distance=2):
     return savings
 
 
-def main():
-    with open("data/input20.txt") as f:
-        i = f.read()
-    m, s, e = parse(i)
+INPUT = "data/input20.txt"
+
+
+def load(f):
+    return parse(as_bytes(f))
+
+
+def part_one(data):
+    m, s, e = data
     savings = find_savings(m, s, e)
-    print(f"part 1: {sum(n for i, n in savings.items() if i >= 100)}")
+    return sum(n for i, n in savings.items() if i >= 100)
+
+
+def part_two(data):
+    m, s, e = data
     savings = find_savings(m, s, e, max_distance=20)
-    print(f"part 2: {sum(n for i, n in savings.items() if i >= 100)}")
+    return sum(n for i, n in savings.items() if i >= 100)
+
+
+def main():
+    with Input.open(INPUT) as f:
+        data = load(f)
+    print(f"part 1: {part_one(data)}")
+    print(f"part 2: {part_two(data)}")
 
 
 @pytest.fixture()
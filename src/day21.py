@@ -3,6 +3,8 @@ import pytest
 from collections import deque, defaultdict
 from functools import cache
 
+import instrument
+
 
 def get_neighbors(previous):
     return {
@@ -93,12 +95,26 @@ def build_dpad_mappings():
     return dpad_mapping
 
 
-def main():
-    with open("data/input21.txt") as f:
-        sequences = [ln.strip() for ln in f if ln.strip()]
+INPUT = "data/input21.txt"
+
+
+def load(f):
+    return [ln.strip() for ln in f if ln.strip()]
+
 
-    print(f"part 1: {calculate(sequences)}")
-    print(f"part 2: {calculate(sequences, n=25)}")
+def part_one(sequences):
+    return calculate(sequences)
+
+
+def part_two(sequences):
+    return calculate(sequences, n=25)
+
+
+def main():
+    with open(INPUT) as f:
+        sequences = load(f)
+    print(f"part 1: {part_one(sequences)}")
+    print(f"part 2: {part_two(sequences)}")
 
 
 def calculate(sequences, n=2):
@@ -111,6 +127,9 @@ def calculate(sequences, n=2):
     for seq in sequences:
         length = recfunc(seq, 0, n)
         total += int(seq[:3]) * length
+    info = recfunc.cache_info()
+    instrument.count("day21.cache_hits", info.hits)
+    instrument.count("day21.cache_misses", info.misses)
     return total
 
 
@@ -43,13 +43,18 @@ def make_sequences(num):
     return sliding_window(p, d)
 
 
-def main():
-    with open("data/input22.txt") as f:
-        nums = [int(ln.strip()) for ln in f if ln.strip()]
+INPUT = "data/input22.txt"
+
+
+def load(f):
+    return [int(ln.strip()) for ln in f if ln.strip()]
+
 
-    finals = [final(num) for num in nums]
-    print(f"part 1: {sum(finals)}")
+def part_one(nums):
+    return sum(final(num) for num in nums)
 
+
+def part_two(nums):
     prices = [get_prices(start) for start in nums]
     diffs = [get_diffs(price) for price in prices]
     sequence_trackers = [
@@ -61,8 +66,14 @@ def main():
         for sequence, profit in tracker.items():
             profits[sequence] += profit
 
-    max_score = max(v for v in profits.values())
-    print(f"part 2: {max_score}")
+    return max(v for v in profits.values())
+
+
+def main():
+    with open(INPUT) as f:
+        nums = load(f)
+    print(f"part 1: {part_one(nums)}")
+    print(f"part 2: {part_two(nums)}")
 
 
 def test_example_part_one_mini():
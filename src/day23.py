@@ -61,13 +61,26 @@ def largest_clique(graph):
     return lan_party
 
 
-def main():
-    with open("data/input23.txt") as f:
-        lines = [ln.strip() for ln in f if ln.strip()]
+INPUT = "data/input23.txt"
+
+
+def load(f):
+    return build_graph(ln.strip() for ln in f if ln.strip())
+
+
+def part_one(g):
+    return len(find_triplets(g))
 
-    g = build_graph(lines)
-    print(f"part 1: {len(find_triplets(g))}")
-    print(f"part 2: {",".join(largest_clique(g))}")
+
+def part_two(g):
+    return ",".join(largest_clique(g))
+
+
+def main():
+    with open(INPUT) as f:
+        g = load(f)
+    print(f"part 1: {part_one(g)}")
+    print(f"part 2: {part_two(g)}")
 
 
 def test_find_triplets():
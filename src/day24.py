@@ -1,5 +1,7 @@
 import operator as ops
 
+import instrument
+
 
 def parse(lines):
     initial_states = {}
@@ -21,19 +23,30 @@ def parse(lines):
 def loop(gates, states):
     funcs = {"AND": ops.__and__, "XOR": ops.__xor__, "OR": ops.__or__}
     queue = [(*k, v) for k, v in gates.items()]
+    requeues = 0
     while queue:
         group = queue.pop(0)
         in1, in2, op, out = group
         if in1 not in states or in2 not in states:
             queue.append(group)
+            requeues += 1
             continue
         states[out] = funcs[op](states[in1], states[in2])
+    instrument.count("day24.requeues", requeues)
     return states
 
 
+def output_wires(wires):
+    """
+    Return the z wires from most to least significant bit. Wire numbers
+    are zero padded to the same width, which is wider than two digits
+    for adders of 100 bits or more.
+    """
+    return sorted((w for w in wires if w.startswith("z")), reverse=True)
+
+
 def get_binary(states):
-    bits = (f"z{n:02}" for n in range(int(max(states)[1:]), -1, -1))
-    return int("".join(str(states[b]) for b in bits), 2)
+    return int("".join(str(states[b]) for b in output_wires(states)), 2)
 
 
 def find_swapped_pins(gates):
@@ -44,12 +57,15 @@ def find_swapped_pins(gates):
         r[a], r[b] = r[b], r[a]
         g[reverse[a]], g[reverse[b]] = g[reverse[b]], g[reverse[a]]
 
+    last = output_wires(reverse)[0]
+    width = len(last) - 1
+
     carry = None
     swapped = set()
-    for i in range(int(max(reverse)[1:])):
-        x = f"x{i:02}"
-        y = f"y{i:02}"
-        z = f"z{i:02}"
+    for i in range(int(last[1:])):
+        x = f"x{i:0{width}}"
+        y = f"y{i:0{width}}"
+        z = f"z{i:0{width}}"
         x_xor_y = gates[x, y, "XOR"]
         x_and_y = gates[x, y, "AND"]
 
@@ -80,13 +96,30 @@ def find_swapped_pins(gates):
     return ",".join(sorted(swapped))
 
 
-def main():
-    with open("data/input24.txt") as f:
-        states, gates = parse(f.read())
+INPUT = "data/input24.txt"
+
+
+def load(f):
+    return parse(f.read().strip())
 
-    states = loop(gates, states)
-    print(f"part 1: {get_binary(states)}")
-    print(f"part 2: {find_swapped_pins(gates)}")
+
+def part_one(data):
+    states, gates = data
+    # loop fills in the states dict as gates resolve
+    return get_binary(loop(gates, dict(states)))
+
+
+def part_two(data):
+    _, gates = data
+    # find_swapped_pins swaps the gate outputs in place
+    return find_swapped_pins(dict(gates))
+
+
+def main():
+    with open(INPUT) as f:
+        data = load(f)
+    print(f"part 1: {part_one(data)}")
+    print(f"part 2: {part_two(data)}")
 
 
 if __name__ == "__main__":
@@ -38,12 +38,22 @@ def parse(lines):
     return locks, keys
 
 
-def main():
-    with open("data/input25.txt") as f:
-        locks, keys = parse(f.read())
+INPUT = "data/input25.txt"
+
+
+def load(f):
+    return parse(f.read())
+
 
-    total = sum(can_fit(lock, key) for lock in locks for key in keys)
-    print(f"part 1: {total}")
+def part_one(data):
+    locks, keys = data
+    return sum(can_fit(lock, key) for lock in locks for key in keys)
+
+
+def main():
+    with open(INPUT) as f:
+        data = load(f)
+    print(f"part 1: {part_one(data)}")
 
 
 def test_count():
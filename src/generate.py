@@ -0,0 +1,520 @@
+import argparse
+import random
+import string
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def permutation(n, rng):
+    """
+    Return a function that maps range(n) onto itself bijectively.
+
+    Uses a small Feistel network with cycle walking so that huge ranges
+    (every cell of a 10^5 x 10^5 grid, say) can be shuffled without ever
+    holding the range in memory.
+    """
+    half = max(1, ((n - 1).bit_length() + 1) // 2)
+    mask = (1 << half) - 1
+    keys = [rng.getrandbits(32) for _ in range(4)]
+
+    def rounds(x):
+        left, right = x >> half, x & mask
+        for k in keys:
+            left, right = right, left ^ (((right * 0x9E3779B1) ^ k) >> 7 & mask)
+        return (left << half) | right
+
+    def permute(i):
+        i = rounds(i)
+        while i >= n:
+            i = rounds(i)
+        return i
+
+    return permute
+
+
+def base26(i, width):
+    letters = []
+    for _ in range(width):
+        i, d = divmod(i, 26)
+        letters.append(string.ascii_lowercase[d])
+    return "".join(reversed(letters))
+
+
+def day04(size, rng):
+    for _ in range(size):
+        yield "".join(rng.choices("XMAS", k=size)) + "\n"
+
+
+def day05(size, rng, pages=49):
+    order = rng.sample(range(10, 100), pages)
+    rules = [(order[i], order[j]) for i in range(pages) for j in range(i + 1, pages)]
+    rng.shuffle(rules)
+    for a, b in rules:
+        yield f"{a}|{b}\n"
+    yield "\n"
+
+    rank = {p: i for i, p in enumerate(order)}
+    for _ in range(size):
+        update = rng.sample(order, rng.randrange(5, min(pages, 23) + 1, 2))
+        if rng.random() < 0.5:
+            update.sort(key=rank.__getitem__)
+        yield ",".join(map(str, update)) + "\n"
+
+
+def day08(size, rng, density=0.015):
+    # about four antennas per frequency like the puzzle
+    alphabet = string.digits + string.ascii_letters
+    freqs = alphabet[: max(1, min(len(alphabet), round(density * size * size / 4)))]
+    for _ in range(size):
+        yield "".join(
+            rng.choice(freqs) if rng.random() < density else "." for _ in range(size)
+        ) + "\n"
+
+
+def day09(size, rng, chunk=1 << 16):
+    # an odd number of digits so that the map starts and ends with a file
+    size |= 1
+    for start in range(0, size, chunk):
+        yield "".join(
+            str(rng.randrange(1, 10) if i % 2 == 0 else rng.randrange(10))
+            for i in range(start, min(start + chunk, size))
+        )
+    yield "\n"
+
+
+def day10(size, rng, noise=0.3):
+    # diagonal staircases make for plenty of overlapping trails
+    for r in range(size):
+        yield "".join(
+            str(rng.randrange(10) if rng.random() < noise else (r + c) % 10)
+            for c in range(size)
+        ) + "\n"
+
+
+def day11(size, rng):
+    for i in range(size):
+        yield (" " if i else "") + str(rng.randrange(10**6))
+    yield "\n"
+
+
+def day12(size, rng, alphabet=string.ascii_uppercase):
+    # copy neighbouring plants most of the time so that regions form
+    above = None
+    for _ in range(size):
+        row = []
+        for c in range(size):
+            p = rng.random()
+            if above is not None and p < 0.45:
+                row.append(above[c])
+            elif row and p < 0.9:
+                row.append(row[-1])
+            else:
+                row.append(rng.choice(alphabet))
+        yield "".join(row) + "\n"
+        above = row
+
+
+def day13(size, rng, offset=10000000000000):
+    def presses(ax, ay, bx, by, gx, gy):
+        divisor = bx * ay - by * ax
+        a, ra = divmod(bx * gy - by * gx, divisor)
+        b, rb = divmod(ay * gx - ax * gy, divisor)
+        return None if ra or rb else (a, b)
+
+    def valid(*machine):
+        # the prize either can't be reached in whole presses or is reached
+        # with a non-negative number of each, for both parts of the puzzle
+        *buttons, gx, gy = machine
+        for extra in (0, offset):
+            p = presses(*buttons, gx + extra, gy + extra)
+            if p is not None and min(p) < 0:
+                return False
+        return True
+
+    for i in range(size):
+        while True:
+            ax, ay, bx, by = (rng.randrange(10, 100) for _ in range(4))
+            if bx * ay - by * ax == 0:
+                continue
+            if rng.random() < 0.5:
+                a, b = rng.randrange(1, 101), rng.randrange(1, 101)
+                gx, gy = a * ax + b * bx, a * ay + b * by
+            else:
+                gx, gy = rng.randrange(1000, 20000), rng.randrange(1000, 20000)
+            if valid(ax, ay, bx, by, gx, gy):
+                break
+        yield "\n" if i else ""
+        yield f"Button A: X+{ax}, Y+{ay}\n"
+        yield f"Button B: X+{bx}, Y+{by}\n"
+        yield f"Prize: X={gx}, Y={gy}\n"
+
+
+def day14(size, rng, width=101, height=103):
+    for _ in range(size):
+        px, py = rng.randrange(width), rng.randrange(height)
+        vx, vy = rng.randrange(-99, 100), rng.randrange(-99, 100)
+        yield f"p={px},{py} v={vx},{vy}\n"
+
+
+def day15(size, rng, moves_per_cell=8):
+    robot = (size // 2, size // 2)
+    for r in range(size):
+        row = []
+        for c in range(size):
+            if r in (0, size - 1) or c in (0, size - 1):
+                row.append("#")
+            elif (r, c) == robot:
+                row.append("@")
+            else:
+                p = rng.random()
+                row.append("#" if p < 0.05 else "O" if p < 0.25 else ".")
+        yield "".join(row) + "\n"
+    yield "\n"
+
+    remaining = moves_per_cell * size * size
+    while remaining:
+        n = min(remaining, 1000)
+        yield "".join(rng.choices("<>^v", k=n)) + "\n"
+        remaining -= n
+
+
+def day16(size, rng, loops=0.05):
+    """
+    A sidewinder maze, which can be generated one row at a time. The start
+    is in the bottom left corner and the end in the top right as in the
+    puzzle. Every so often an extra wall is knocked out so that there is
+    more than one route through the maze.
+    """
+    cells = (size - 1) // 2
+    side = 2 * cells + 1
+    yield "#" * side + "\n"
+    yield "#" + "." * (side - 3) + "E#\n"
+
+    for i in range(1, cells):
+        east = [False] * cells
+        north = [False] * cells
+        run_start = 0
+        for j in range(cells):
+            if j < cells - 1 and rng.random() < 0.5:
+                east[j] = True
+                continue
+            north[rng.randrange(run_start, j + 1)] = True
+            run_start = j + 1
+        for j in range(cells):
+            north[j] = north[j] or rng.random() < loops
+
+        yield "#" + "".join(("." if n else "#") + "#" for n in north) + "\n"
+        row = "".join("." + ("." if e else "#") for e in east)
+        if i == cells - 1:
+            row = "S" + row[1:]
+        yield "#" + row + "\n"
+
+    yield "#" * side + "\n"
+
+
+def day18(size, rng):
+    """
+    Every cell apart from the start and the end eventually gets corrupted.
+    The cells of one random staircase path to the exit fall last, so the
+    exit is only cut off late in the input as in the puzzle.
+    """
+    path = set()
+    x = y = 0
+    while (x, y) != (size - 1, size - 1):
+        path.add((x, y))
+        if y == size - 1 or x < size - 1 and rng.random() < 0.5:
+            x += 1
+        else:
+            y += 1
+    path.add((x, y))
+
+    cells = size * size
+    permute = permutation(cells, rng)
+    for i in range(cells):
+        y, x = divmod(permute(i), size)
+        if (x, y) not in path:
+            yield f"{x},{y}\n"
+
+    path = sorted(path - {(0, 0), (size - 1, size - 1)})
+    rng.shuffle(path)
+    for x, y in path:
+        yield f"{x},{y}\n"
+
+
+def day19(size, rng, towels=450, colors="wubrg"):
+    available = set()
+    while len(available) < towels:
+        available.add("".join(rng.choices(colors, k=rng.randrange(1, 9))))
+    available = sorted(available)
+    rng.shuffle(available)
+    yield ", ".join(available) + "\n\n"
+
+    for _ in range(size):
+        length = rng.randrange(20, 61)
+        if rng.random() < 0.5:
+            pattern = ""
+            while len(pattern) < length:
+                pattern += rng.choice(available)
+        else:
+            pattern = "".join(rng.choices(colors, k=length))
+        yield pattern + "\n"
+
+
+def day20(size, rng):
+    """
+    A serpentine race track: corridors joined at alternating ends, so that
+    there is exactly one path from S to E. The walls between corridors are
+    one or two rows thick, which varies how much a cheat can save.
+    """
+    row = 1
+    k = 0
+    yield "#" * size + "\n"
+    while True:
+        thickness = rng.choice((1, 1, 2))
+        last = row + thickness + 1 > size - 2
+
+        track = ["."] * (size - 2)
+        if k == 0:
+            track[0] = "S"
+        if last:
+            track[-1 if k % 2 == 0 else 0] = "E"
+        yield "#" + "".join(track) + "#\n"
+        if last:
+            break
+
+        wall = ["#"] * size
+        wall[size - 2 if k % 2 == 0 else 1] = "."
+        for _ in range(thickness):
+            yield "".join(wall) + "\n"
+        row += thickness + 1
+        k += 1
+
+    for _ in range(row + 1, size):
+        yield "#" * size + "\n"
+
+
+def day21(size, rng):
+    for _ in range(size):
+        yield f"{rng.randrange(1000):03}A\n"
+
+
+def day22(size, rng):
+    for _ in range(size):
+        yield f"{rng.randrange(1, 1 << 24)}\n"
+
+
+def day23(size, rng, degree=13, clique=13):
+    width = 2
+    while 26**width < size:
+        width += 1
+    permute = permutation(26**width, rng)
+    names = [base26(permute(i), width) for i in range(size)]
+
+    for i in range(min(clique, size)):
+        for j in range(i + 1, min(clique, size)):
+            yield f"{names[i]}-{names[j]}\n"
+
+    for i in range(size):
+        for _ in range(degree // 2):
+            j = rng.randrange(size)
+            if j != i:
+                yield f"{names[i]}-{names[j]}\n"
+
+
+def day24(size, rng, swaps=4, window=64):
+    """
+    A ripple carry adder over `size` bit inputs. `swaps` pairs of gate
+    outputs are exchanged on separate bits, in the same ways the puzzle
+    input is scrambled.
+    """
+    digits = max(2, len(str(size)))
+    x = [f"x{i:0{digits}}" for i in range(size)]
+    y = [f"y{i:0{digits}}" for i in range(size)]
+    z = [f"z{i:0{digits}}" for i in range(size + 1)]
+
+    for wires in (x, y):
+        for w in wires:
+            yield f"{w}: {rng.randrange(2)}\n"
+    yield "\n"
+
+    # internal wires start with a-w so they never clash with x/y/z
+    width = 3
+    while 23 * 26 ** (width - 1) < 4 * size:
+        width += 1
+    permute = permutation(23 * 26 ** (width - 1), rng)
+    next_wire = iter(range(4 * size))
+
+    def wire():
+        i = permute(next(next_wire))
+        first, rest = divmod(i, 26 ** (width - 1))
+        return string.ascii_lowercase[first] + base26(rest, width - 1)
+
+    candidates = list(range(2, size - 1, 3))
+    swapped = dict.fromkeys(rng.sample(candidates, min(swaps, len(candidates))))
+
+    pending = []
+    carry = None
+    for i in range(size):
+        if carry is None:
+            carry = wire() if size > 1 else z[1]
+            gates = [(x[i], "XOR", y[i], z[i]), (x[i], "AND", y[i], carry)]
+        else:
+            xor, and_, t = wire(), wire(), wire()
+            out = z[i + 1] if i == size - 1 else wire()
+            gates = [
+                (x[i], "XOR", y[i], xor),
+                (x[i], "AND", y[i], and_),
+                (carry, "XOR", xor, z[i]),
+                (carry, "AND", xor, t),
+                (t, "OR", and_, out),
+            ]
+            if i in swapped:
+                a, b = rng.choice(((0, 1), (2, 3), (2, 4), (1, 2)))
+                ga, gb = gates[a], gates[b]
+                gates[a], gates[b] = (*ga[:3], gb[3]), (*gb[:3], ga[3])
+            carry = out
+        pending += gates
+
+        if len(pending) >= window or i == size - 1:
+            rng.shuffle(pending)
+            for in1, op, in2, out in pending:
+                yield f"{in1} {op} {in2} -> {out}\n"
+            pending = []
+
+
+def day25(size, rng):
+    for i in range(size):
+        heights = [rng.randrange(6) for _ in range(5)]
+        is_lock = rng.random() < 0.5
+        rows = ["#####"] if is_lock else ["....."]
+        for r in range(1, 6):
+            if is_lock:
+                rows.append("".join("#" if r <= h else "." for h in heights))
+            else:
+                rows.append("".join("#" if r >= 6 - h else "." for h in heights))
+        rows.append("....." if is_lock else "#####")
+        yield ("\n" if i else "") + "\n".join(rows) + "\n"
+
+
+# day -> (generator, default size). The default sizes are roughly the
+# size of the real puzzle inputs.
+GENERATORS = {
+    4: (day04, 140),
+    5: (day05, 200),
+    8: (day08, 50),
+    9: (day09, 19999),
+    10: (day10, 57),
+    11: (day11, 8),
+    12: (day12, 140),
+    13: (day13, 320),
+    14: (day14, 500),
+    15: (day15, 50),
+    16: (day16, 141),
+    18: (day18, 71),
+    19: (day19, 400),
+    20: (day20, 141),
+    21: (day21, 5),
+    22: (day22, 2000),
+    23: (day23, 520),
+    24: (day24, 45),
+    25: (day25, 500),
+}
+
+
+def generate(day, size=None, seed=0, **options):
+    """
+    Yield the text of an input for the given day in chunks. The same
+    day, size, seed and options always produce the same input.
+    """
+    func, default = GENERATORS[day]
+    rng = random.Random(f"{day}:{seed}")
+    return func(default if size is None else size, rng, **options)
+
+
+def write(day, f, size=None, seed=0, **options):
+    for chunk in generate(day, size, seed, **options):
+        f.write(chunk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic inputs")
+    parser.add_argument("days", nargs="*", type=int, help="days (default: all)")
+    parser.add_argument("--size", type=int, help="input size (default: puzzle size)")
+    parser.add_argument("--seed", type=int, default=0)
+    out = parser.add_mutually_exclusive_group()
+    out.add_argument("-o", "--output", help="file to write a single day to")
+    out.add_argument("--out-dir", help="write inputN.txt files to this directory")
+    args = parser.parse_args(argv)
+
+    days = args.days or sorted(GENERATORS)
+    if args.out_dir:
+        out_dir = Path(args.out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for day in days:
+            with open(out_dir / f"input{day}.txt", "w") as f:
+                write(day, f, args.size, args.seed)
+    elif args.output:
+        if len(days) != 1:
+            parser.error("--output needs exactly one day")
+        with open(args.output, "w") as f:
+            write(days[0], f, args.size, args.seed)
+    else:
+        for day in days:
+            write(day, sys.stdout, args.size, args.seed)
+
+
+def test_deterministic():
+    for day in GENERATORS:
+        a = "".join(generate(day, 12, seed=3))
+        b = "".join(generate(day, 12, seed=3))
+        assert a == b
+        assert a != "".join(generate(day, 12, seed=4))
+
+
+def test_permutation():
+    rng = random.Random(1)
+    for n in (1, 2, 10, 1000, 4097):
+        permute = permutation(n, rng)
+        assert sorted(permute(i) for i in range(n)) == list(range(n))
+
+
+def test_disk_map_size():
+    s = "".join(generate(9, 100_000))
+    assert len(s.strip()) == 100_001
+    assert s[0] != "0" and s.strip()[-1] != "0"
+
+
+@pytest.mark.parametrize(
+    "day,size",
+    [
+        (4, 20), (5, 20), (8, 20), (9, 101), (10, 20), (11, 5), (12, 20),
+        (13, 20), (14, 20), (15, 12), (16, 21), (18, 30), (18, 71), (19, 20), (20, 21),
+        (21, 5), (22, 5), (23, 60), (24, 20), (25, 20),
+    ],
+)  # fmt: skip
+def test_inputs_solve(day, size, tmp_path):
+    from main import run_day
+
+    with open(tmp_path / f"input{day}.txt", "w") as f:
+        write(day, f, size, seed=1)
+    results = run_day(day, tmp_path, trace_memory=False)
+    # day 15 part two has never worked
+    errors = [
+        r.error for r in results if r.error and (day, r.phase) != (15, "part_two")
+    ]
+    assert errors == []
+    assert len(results) == (2 if day == 25 else 3)
+
+
+def test_maze_shape():
+    lines = "".join(generate(16, 21)).split()
+    assert len(lines) == 21
+    assert all(len(ln) == 21 for ln in lines)
+    assert lines[1][-2] == "E"
+    assert lines[-2][1] == "S"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import pytest
+
+from inputs import split_lines
+
+
+class Grid:
+    """
+    A rectangular grid of single byte cells stored row by row in one flat
+    bytearray. Cells are addressed by their integer index into that array.
+
+    The grid is surrounded by `pad` rings of `border` cells, so stepping
+    off an edge by up to `pad` cells lands on a border cell instead of
+    wrapping around or raising. Hot loops can then check neighbours with a
+    plain `cells[i + offset]` and no bounds checks.
+    """
+
+    def __init__(self, rows, cols, pad=1, border=b"#", fill=b"."):
+        self.rows = rows
+        self.cols = cols
+        self.pad = pad
+        self.border = border[0]
+        self.stride = cols + 2 * pad
+        self.cells = bytearray(border * (self.stride * (rows + 2 * pad)))
+        for r in range(rows):
+            start = self.index(r, 0)
+            self.cells[start : start + cols] = fill * cols
+        self._set_offsets()
+
+    def _set_offsets(self):
+        s = self.stride
+        # N, E, S, W
+        self.offsets4 = (-s, 1, s, -1)
+        # N, NE, E, SE, S, SW, W, NW
+        self.offsets8 = (-s, -s + 1, 1, s + 1, s, s - 1, -1, -s - 1)
+
+    @classmethod
+    def from_lines(cls, lines, pad=1, border=b"#"):
+        """
+        Build a grid from an iterable of str, bytes or memoryview rows.
+        Trailing whitespace is ignored and so are blank lines. Rows are
+        copied straight into the padded buffer without any per-cell
+        objects being created.
+        """
+        grid = cls.__new__(cls)
+        grid.pad = pad
+        grid.border = border[0]
+        cells = bytearray()
+        rows = 0
+        cols = None
+        for line in lines:
+            if isinstance(line, str):
+                line = line.encode()
+            line = bytes(line).rstrip()
+            if not line:
+                continue
+            if cols is None:
+                cols = len(line)
+                cells += border * ((cols + 2 * pad) * pad)
+            elif len(line) != cols:
+                raise ValueError(f"row {rows} has {len(line)} cells, expected {cols}")
+            cells += border * pad
+            cells += line
+            cells += border * pad
+            rows += 1
+
+        cols = cols or 0
+        cells += border * ((cols + 2 * pad) * pad)
+        grid.rows = rows
+        grid.cols = cols
+        grid.stride = cols + 2 * pad
+        grid.cells = cells
+        grid._set_offsets()
+        return grid
+
+    @classmethod
+    def from_bytes(cls, data, pad=1, border=b"#"):
+        return cls.from_lines(split_lines(data), pad, border)
+
+    @classmethod
+    def from_file(cls, f, pad=1, border=b"#"):
+        """
+        Read a grid from a path or a binary file object.
+        """
+        if hasattr(f, "read"):
+            return cls.from_bytes(f.read(), pad, border)
+        with open(f, "rb") as fh:
+            return cls.from_bytes(fh.read(), pad, border)
+
+    def index(self, r, c):
+        return (r + self.pad) * self.stride + c + self.pad
+
+    def coords(self, i):
+        r, c = divmod(i, self.stride)
+        return r - self.pad, c - self.pad
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, i):
+        return self.cells[i]
+
+    def __setitem__(self, i, value):
+        self.cells[i] = value
+
+    def get(self, r, c):
+        return chr(self.cells[self.index(r, c)])
+
+    def set(self, r, c, ch):
+        self.cells[self.index(r, c)] = ord(ch)
+
+    def indices(self):
+        """
+        Yield the index of every cell inside the border, row by row.
+        """
+        for r in range(self.rows):
+            start = self.index(r, 0)
+            yield from range(start, start + self.cols)
+
+    def find(self, ch):
+        """
+        Return the index of the first cell holding ch, or -1.
+        """
+        return self.cells.find(ord(ch))
+
+    def find_all(self, ch):
+        value = ord(ch)
+        cells = self.cells
+        found = []
+        i = cells.find(value)
+        while i != -1:
+            found.append(i)
+            i = cells.find(value, i + 1)
+        return found
+
+    def row(self, r):
+        start = self.index(r, 0)
+        return memoryview(self.cells)[start : start + self.cols]
+
+    def lines(self):
+        return [bytes(self.row(r)).decode() for r in range(self.rows)]
+
+    def copy(self):
+        grid = self.__class__.__new__(self.__class__)
+        grid.__dict__.update(self.__dict__)
+        grid.cells = bytearray(self.cells)
+        return grid
+
+
+def test_from_lines():
+    grid = Grid.from_lines(["#S.", ".#E", ""], pad=2, border=b"\0")
+    assert (grid.rows, grid.cols, grid.stride) == (2, 3, 7)
+    assert len(grid.cells) == 7 * 6
+    assert grid.get(0, 1) == "S"
+    assert grid.coords(grid.find("E")) == (1, 2)
+    assert grid.lines() == ["#S.", ".#E"]
+
+    # two steps off any edge lands on the border
+    i = grid.index(0, 0)
+    assert grid[i + 2 * grid.offsets4[0]] == 0
+    assert grid[i + 2 * grid.offsets4[3]] == 0
+
+
+def test_from_bytes():
+    grid = Grid.from_bytes(b"ab\ncd\n")
+    assert grid.lines() == ["ab", "cd"]
+    assert [grid.coords(i) for i in grid.indices()] == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert grid.find_all("#") == [
+        i for i in range(len(grid.cells)) if i not in set(grid.indices())
+    ]
+
+
+def test_blank_grid():
+    grid = Grid(3, 2)
+    grid.set(2, 1, "#")
+    assert grid.lines() == ["..", "..", ".#"]
+    copy = grid.copy()
+    copy.set(0, 0, "O")
+    assert grid.get(0, 0) == "."
+
+
+def test_ragged_rows():
+    with pytest.raises(ValueError):
+        Grid.from_lines(["abc", "ab"])
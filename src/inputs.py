@@ -0,0 +1,107 @@
+import mmap
+import os
+
+
+class Input:
+    """
+    The bytes of a puzzle input. Input.open memory maps the file, so the
+    input is never copied into Python objects as a whole; lines() hands
+    out memoryview slices of the mapping, and parsers that work on bytes
+    can pull numbers or grid rows straight out of it.
+
+    It also reads like a text file (read() and iteration over str lines)
+    so loaders that expect one keep working. Parsed data must not hold on
+    to the views, since they become invalid once the input is closed.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._map = None
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"")
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        inp = cls(data)
+        inp._map = data
+        return inp
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.data)
+
+    def lines(self):
+        return split_lines(self.data)
+
+    def text(self):
+        return str(self.data, "utf-8")
+
+    def read(self):
+        return self.text()
+
+    def __iter__(self):
+        for line in self.lines():
+            yield str(line, "utf-8") + "\n"
+
+
+def split_lines(data):
+    """
+    Yield the lines of a bytes-like object as memoryview slices, without
+    copying them.
+    """
+    view = memoryview(data)
+    start = 0
+    end = data.find(b"\n")
+    while end != -1:
+        yield view[start:end]
+        start = end + 1
+        end = data.find(b"\n", start)
+    if start < len(view):
+        yield view[start:]
+    view.release()
+
+
+def as_bytes(f):
+    """
+    Return the contents of an Input, or of a text or binary file object,
+    as a bytes-like object. Inputs aren't copied.
+    """
+    if isinstance(f, Input):
+        return f.data
+    data = f.read()
+    return data.encode() if isinstance(data, str) else data
+
+
+def lines(f):
+    return split_lines(as_bytes(f))
+
+
+def test_open(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"12,3\n4,56\n")
+    with Input.open(path) as f:
+        assert [bytes(ln) for ln in f.lines()] == [b"12,3", b"4,56"]
+        assert list(f) == ["12,3\n", "4,56\n"]
+        assert f.read() == "12,3\n4,56\n"
+        assert as_bytes(f) is f.data
+
+    path.write_bytes(b"")
+    with Input.open(path) as f:
+        assert list(f.lines()) == [] and f.read() == ""
+
+
+def test_split_lines():
+    assert [bytes(ln) for ln in split_lines(b"a\n\nbc")] == [b"a", b"", b"bc"]
+    assert [bytes(ln) for ln in split_lines(bytearray(b"a\n"))] == [b"a"]
@@ -0,0 +1,137 @@
+"""
+Named counters and timers for looking inside the solvers.
+
+Everything here does nothing unless enable() has been called. Hot loops
+shouldn't call count() per iteration; they keep a local int (or derive the
+number afterwards, like the size of a visited set) and report it once
+when they finish, so a disabled run pays for one call per search at most.
+"""
+
+import cProfile
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+enabled = False
+counters = Counter()
+timers = Counter()
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    counters.clear()
+    timers.clear()
+
+
+def count(name, n=1):
+    if enabled:
+        counters[name] += n
+
+
+class _Timer:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        timers[self.name] += time.perf_counter() - self.start
+
+
+def timer(name):
+    """
+    A context manager that adds the time spent inside it to timer `name`.
+    """
+    return _Timer(name) if enabled else nullcontext()
+
+
+def snapshot():
+    """
+    Return the counters and timers (as name.seconds) recorded so far.
+    """
+    stats = dict(counters)
+    stats.update((f"{name}.seconds", t) for name, t in timers.items())
+    return stats
+
+
+PROFILERS = ("cprofile", "tracemalloc")
+
+
+@contextmanager
+def profiling(mode, path):
+    """
+    Run the body under cProfile or tracemalloc and write what was found
+    to path: pstats data for cProfile (view it with `python -m pstats`),
+    or a dump of the heap snapshot plus a listing of the top allocation
+    sites (path with a .txt suffix) for tracemalloc.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if mode == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(path)
+        return
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(10)
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        if started:
+            tracemalloc.stop()
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        snapshot.dump(path)
+        with open(path.with_suffix(".txt"), "w") as f:
+            for stat in snapshot.statistics("lineno")[:50]:
+                print(stat, file=f)
+
+
+def test_disabled():
+    reset()
+    count("x")
+    with timer("t"):
+        pass
+    assert snapshot() == {}
+
+
+def test_counters():
+    reset()
+    enable()
+    try:
+        count("x")
+        count("x", 4)
+        with timer("t"):
+            pass
+        stats = snapshot()
+        assert stats["x"] == 5
+        assert stats["t.seconds"] >= 0
+    finally:
+        enable(False)
+        reset()
+
+
+def test_profiling(tmp_path):
+    with profiling("cprofile", tmp_path / "a.prof"):
+        sum(range(1000))
+    assert (tmp_path / "a.prof").stat().st_size > 0
+
+    with profiling("tracemalloc", tmp_path / "a.tracemalloc"):
+        data = [bytes(100) for _ in range(100)]
+    assert data and (tmp_path / "a.txt").read_text()
+    assert not tracemalloc.is_tracing()
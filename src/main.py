@@ -0,0 +1,605 @@
+import argparse
+import heapq
+import importlib
+import json
+import math
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict, field
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import instrument
+from cache import CACHE_DIR, MAX_BYTES, Cache, cache_key
+from inputs import Input
+
+SRC = Path(__file__).parent
+PHASES = ("load", "part_one", "part_two")
+TIMINGS = ".aoc-timings.json"
+
+
+@dataclass
+class PhaseResult:
+    day: int
+    phase: str
+    wall: float
+    cpu: float
+    peak: int | None
+    answer: str | None = None
+    error: str | None = None
+    cached: bool = False
+    stats: dict = field(default_factory=dict)
+
+
+@dataclass
+class Instrumentation:
+    """
+    What to record while a phase runs: the instrument counters and
+    timers, and optionally a cProfile or tracemalloc profile written to
+    profile_dir/dayNN.phase.prof (or .tracemalloc).
+    """
+
+    counters: bool = False
+    profiler: str | None = None
+    profile_dir: str = "profiles"
+
+    @contextmanager
+    def phase(self, day, phase):
+        instrument.reset()
+        instrument.enable(self.counters)
+        try:
+            if self.profiler is None:
+                yield
+            else:
+                suffix = ".prof" if self.profiler == "cprofile" else ".tracemalloc"
+                path = Path(self.profile_dir) / f"day{day:02}.{phase}{suffix}"
+                with instrument.profiling(self.profiler, path):
+                    yield
+        finally:
+            instrument.enable(False)
+
+
+def discover():
+    """
+    Return the day numbers of every src/dayNN.py module.
+    """
+    return sorted(int(p.stem[3:]) for p in SRC.glob("day[0-9][0-9].py"))
+
+
+def load_day(day):
+    if str(SRC) not in sys.path:
+        sys.path.insert(0, str(SRC))
+    return importlib.import_module(f"day{day:02}")
+
+
+def input_path(module, data_dir=None):
+    if data_dir is None:
+        return Path(module.INPUT)
+    return Path(data_dir) / Path(module.INPUT).name
+
+
+def measure(func, *args, trace_memory=True, around=None):
+    """
+    Call func(*args) and return its result along with the wall time,
+    CPU time and peak traced memory of the call. Exceptions are caught
+    and returned so that one broken day doesn't stop the whole run.
+    The call runs inside the `around` context manager, if there is one.
+    """
+    if trace_memory:
+        tracemalloc.reset_peak()
+
+    result, error = None, None
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        with around or nullcontext():
+            result = func(*args)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    return result, wall, cpu, peak, error
+
+
+@contextmanager
+def tracing(enabled):
+    if enabled:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if enabled:
+            tracemalloc.stop()
+
+
+def parts_of(module):
+    return [phase for phase in PHASES[1:] if hasattr(module, phase)]
+
+
+def around(instrumentation, day, phase):
+    return None if instrumentation is None else instrumentation.phase(day, phase)
+
+
+def load_phase(day, data_dir=None, trace_memory=True, cache=None, instrumentation=None):
+    """
+    Time the load phase of a day. Returns its PhaseResult, the parsed
+    data, and with a Cache the cache key and the answers stored for it.
+
+    With a Cache, the load phase hashes the input and the day's source
+    and reuses a stored parse. If every answer is already stored nothing
+    is parsed at all and the data is None.
+    """
+    module = load_day(day)
+    path = input_path(module, data_dir)
+    key, answers, hit = None, {}, False
+
+    def load():
+        nonlocal key, answers, hit
+        with Input.open(path) as f:
+            if cache is None:
+                return module.load(f)
+
+            key = cache_key(module, f.data)
+            answers = cache.get_answers(key)
+            if all(phase in answers for phase in parts_of(module)):
+                hit = True
+                return None
+            hit, data = cache.get_parsed(key)
+            if not hit:
+                data = module.load(f)
+                cache.put_parsed(key, data)
+            return data
+
+    data, wall, cpu, peak, error = measure(
+        load,
+        trace_memory=trace_memory,
+        around=around(instrumentation, day, "load"),
+    )
+    result = PhaseResult(day, "load", wall, cpu, peak, error=error, cached=hit)
+    result.stats = instrument.snapshot()
+    return result, data, key, answers
+
+
+def part_phase(day, phase, data, trace_memory=True, instrumentation=None):
+    answer, wall, cpu, peak, error = measure(
+        getattr(load_day(day), phase),
+        data,
+        trace_memory=trace_memory,
+        around=around(instrumentation, day, phase),
+    )
+    answer = None if answer is None else str(answer)
+    result = PhaseResult(day, phase, wall, cpu, peak, answer, error)
+    result.stats = instrument.snapshot()
+    return result
+
+
+def cached_result(day, phase, answer):
+    return PhaseResult(day, phase, 0.0, 0.0, None, answer, cached=True)
+
+
+def run_day(day, data_dir=None, trace_memory=True, cache=None, instrumentation=None):
+    """
+    Run the load, part_one and part_two phases of a day and time each
+    one separately. Parts receive the output of load so parsing is only
+    ever done once, and parts whose answers are cached aren't run.
+    """
+    module = load_day(day)
+    with tracing(trace_memory):
+        result, data, key, answers = load_phase(
+            day, data_dir, trace_memory, cache, instrumentation
+        )
+        results = [result]
+        if result.error is not None:
+            return results
+
+        solved = {}
+        for phase in parts_of(module):
+            if phase in answers:
+                results.append(cached_result(day, phase, answers[phase]))
+                continue
+            result = part_phase(day, phase, data, trace_memory, instrumentation)
+            results.append(result)
+            if result.error is None:
+                solved[phase] = result.answer
+
+    if cache is not None and solved:
+        cache.put_answers(key, solved)
+    return results
+
+
+def _untracked(shm):
+    # blocks are unlinked by the parent once their parts are done, so keep
+    # the workers' resource trackers from unlinking them again at exit
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _load_job(day, data_dir, trace_memory, cache, instrumentation):
+    """
+    Run a load phase in a worker and leave the pickled data in a shared
+    memory block, so the part jobs of the day read it from there instead
+    of having it pickled and sent to them one by one.
+    """
+    load_day(day)
+    with tracing(trace_memory):
+        result, data, key, answers = load_phase(
+            day, data_dir, trace_memory, cache, instrumentation
+        )
+
+    block = None
+    if result.error is None and data is not None:
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        shm = _untracked(SharedMemory(create=True, size=len(payload)))
+        shm.buf[: len(payload)] = payload
+        block = (shm.name, len(payload))
+        shm.close()
+    return result, block, key, answers
+
+
+def _part_job(day, phase, block, trace_memory, instrumentation):
+    name, size = block
+    shm = _untracked(SharedMemory(name=name))
+    try:
+        with shm.buf[:size] as view:
+            data = pickle.loads(view)
+    finally:
+        shm.close()
+
+    with tracing(trace_memory):
+        return part_phase(day, phase, data, trace_memory, instrumentation)
+
+
+def _release(block):
+    shm = SharedMemory(name=block[0])
+    shm.close()
+    shm.unlink()
+
+
+def priorities(days, timings):
+    """
+    Return the expected time of every (day, phase) job. A load job is
+    worth its own time plus its slowest part, since the parts can't start
+    until it's done. Days without recorded timings are assumed slow so
+    they aren't left until last.
+    """
+    expected = {}
+    for day in days:
+        recorded = timings.get(str(day), {})
+        parts = [recorded.get(phase, math.inf) for phase in PHASES[1:]]
+        expected[day, "load"] = recorded.get("load", math.inf) + max(parts)
+        for phase, t in zip(PHASES[1:], parts):
+            expected[day, phase] = t
+    return expected
+
+
+def run_parallel(
+    days,
+    data_dir=None,
+    trace_memory=True,
+    cache=None,
+    instrumentation=None,
+    workers=None,
+    timings=None,
+):
+    """
+    Run days on a process pool, with each load and part as a separate
+    job. Jobs start longest expected first (from `timings`, as recorded by
+    earlier runs) once the jobs they depend on are done.
+    """
+    workers = workers or os.cpu_count()
+    expected = priorities(days, timings or {})
+    ready = [(-expected[day, "load"], day, "load") for day in days]
+    heapq.heapify(ready)
+
+    results = []
+    blocks, pending, keys, solved = {}, {}, {}, {}
+    running = {}
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            while ready or running:
+                while ready and len(running) < workers:
+                    _, day, phase = heapq.heappop(ready)
+                    if phase == "load":
+                        job = (_load_job, day, data_dir, trace_memory, cache)
+                    else:
+                        job = (_part_job, day, phase, blocks[day], trace_memory)
+                    running[pool.submit(*job, instrumentation)] = day, phase
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    day, phase = running.pop(future)
+                    if phase == "load":
+                        result, block, keys[day], answers = future.result()
+                        results.append(result)
+                        if result.error is not None:
+                            continue
+                        pending[day] = []
+                        for part in parts_of(load_day(day)):
+                            if part in answers:
+                                results.append(cached_result(day, part, answers[part]))
+                            else:
+                                pending[day].append(part)
+                                heapq.heappush(ready, (-expected[day, part], day, part))
+                        if pending[day]:
+                            blocks[day] = block
+                        continue
+
+                    result = future.result()
+                    results.append(result)
+                    if result.error is None:
+                        solved.setdefault(day, {})[phase] = result.answer
+                    pending[day].remove(phase)
+                    if not pending[day]:
+                        _release(blocks.pop(day))
+    finally:
+        for block in blocks.values():
+            _release(block)
+
+    if cache is not None:
+        for day, answers in solved.items():
+            cache.put_answers(keys[day], answers)
+
+    order = {phase: i for i, phase in enumerate(PHASES)}
+    return sorted(results, key=lambda r: (days.index(r.day), order[r.phase]))
+
+
+def load_timings(path):
+    if not Path(path).exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_timings(path, results):
+    """
+    Record the wall time of every phase that actually ran, for ordering
+    the jobs of later parallel runs.
+    """
+    timings = load_timings(path)
+    for r in results:
+        if not r.cached and r.error is None:
+            timings.setdefault(str(r.day), {})[r.phase] = r.wall
+    with open(path, "w") as f:
+        json.dump(timings, f, indent=2)
+
+
+def format_size(n):
+    if n is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+def answer_text(r):
+    if r.error is not None:
+        return f"error: {r.error}"
+    return " ".join(filter(None, [r.answer, "(cached)" if r.cached else None]))
+
+
+def format_table(results):
+    header = ("day", "phase", "wall (ms)", "cpu (ms)", "peak mem", "answer")
+    rows = [
+        (
+            f"{r.day:02}",
+            r.phase,
+            f"{r.wall * 1000:.2f}",
+            f"{r.cpu * 1000:.2f}",
+            format_size(r.peak),
+            answer_text(r),
+        )
+        for r in results
+    ]
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(5)]
+
+    def fmt(row):
+        cols = [row[0].rjust(widths[0]), row[1].ljust(widths[1])]
+        cols += [row[i].rjust(widths[i]) for i in range(2, 5)]
+        return "  ".join(cols + [row[5]])
+
+    lines = [fmt(header), "  ".join("-" * w for w in widths) + "  " + "-" * 6]
+    lines += [fmt(row) for row in rows]
+
+    wall = sum(r.wall for r in results)
+    cpu = sum(r.cpu for r in results)
+    lines.append(f"total: {wall * 1000:.2f} ms wall, {cpu * 1000:.2f} ms cpu")
+    return "\n".join(lines)
+
+
+def format_stats(results):
+    lines = []
+    for r in results:
+        for name, value in sorted(r.stats.items()):
+            value = f"{value * 1000:.2f} ms" if isinstance(value, float) else value
+            lines.append(f"{r.day:02}  {r.phase:<8}  {name}: {value}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run and time the Python days")
+    parser.add_argument("days", nargs="*", type=int, help="days to run (default: all)")
+    parser.add_argument(
+        "--data-dir", help="read inputN.txt from this directory instead of data/"
+    )
+    parser.add_argument(
+        "--json", metavar="PATH", help="write results as JSON ('-' for stdout)"
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="skip tracemalloc peak memory tracking (it slows down the solvers)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="reuse parsed inputs and answers from earlier runs",
+    )
+    parser.add_argument(
+        "--cache-dir", default=CACHE_DIR, help=f"(default: {CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=MAX_BYTES // 2**20,
+        metavar="MIB",
+        help="evict the least recently used entries past this size",
+    )
+    parser.add_argument(
+        "--clear-cache", action="store_true", help="empty the cache before running"
+    )
+    parser.add_argument(
+        "--counters",
+        action="store_true",
+        help="record and print the instrument counters and timers",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=instrument.PROFILERS,
+        help="profile every phase and write the results to --profile-dir",
+    )
+    parser.add_argument("--profile-dir", default="profiles", help="(default: profiles)")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="run loads and parts in parallel on this many processes (0: one per CPU)",
+    )
+    parser.add_argument(
+        "--timings",
+        default=TIMINGS,
+        help=f"where phase timings are kept for ordering parallel jobs (default: {TIMINGS})",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    days = args.days or discover()
+    cache = Cache(args.cache_dir, args.cache_size * 2**20)
+    if args.clear_cache:
+        cache.clear()
+    if not args.cache:
+        cache = None
+
+    trace_memory = not args.no_memory
+    instrumentation = None
+    if args.counters or args.profile:
+        instrumentation = Instrumentation(args.counters, args.profile, args.profile_dir)
+
+    start = time.perf_counter()
+    if args.jobs == 1:
+        results = []
+        for day in days:
+            results += run_day(day, args.data_dir, trace_memory, cache, instrumentation)
+    else:
+        results = run_parallel(
+            days,
+            args.data_dir,
+            trace_memory,
+            cache,
+            instrumentation,
+            workers=args.jobs or None,
+            timings=load_timings(args.timings),
+        )
+    elapsed = time.perf_counter() - start
+    save_timings(args.timings, results)
+
+    if args.json == "-":
+        print(json.dumps([asdict(r) for r in results], indent=2))
+        return
+
+    print(format_table(results))
+    if args.counters:
+        print(format_stats(results))
+    if args.jobs != 1:
+        print(
+            f"elapsed: {elapsed * 1000:.2f} ms on {args.jobs or os.cpu_count()} processes"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+
+
+def test_run_day(tmp_path):
+    (tmp_path / "input11.txt").write_text("125 17\n")
+    results = run_day(11, tmp_path)
+    assert [r.phase for r in results] == list(PHASES)
+    assert all(r.error is None for r in results)
+    assert results[1].answer == "55312"
+    assert results[0].peak > 0
+
+
+def test_missing_input(tmp_path):
+    results = run_day(11, tmp_path, trace_memory=False)
+    assert len(results) == 1
+    assert results[0].error.startswith("FileNotFoundError")
+    assert results[0].peak is None
+
+
+def test_cached_run(tmp_path):
+    (tmp_path / "input11.txt").write_text("125 17\n")
+    cache = Cache(tmp_path / "cache")
+    first = run_day(11, tmp_path, trace_memory=False, cache=cache)
+    assert not any(r.cached for r in first)
+
+    again = run_day(11, tmp_path, trace_memory=False, cache=cache)
+    assert all(r.cached for r in again)
+    assert [r.answer for r in again] == [r.answer for r in first]
+
+    # a different input misses but the old entry stays around
+    (tmp_path / "input11.txt").write_text("125 18\n")
+    other = run_day(11, tmp_path, trace_memory=False, cache=cache)
+    assert not any(r.cached for r in other)
+    assert other[1].answer != first[1].answer
+
+
+def test_instrumentation(tmp_path):
+    (tmp_path / "input16.txt").write_text("#####\n#S.E#\n#####\n")
+    instrumentation = Instrumentation(True, "cprofile", tmp_path / "profiles")
+    results = run_day(16, tmp_path, False, instrumentation=instrumentation)
+    assert [r.answer for r in results] == [None, "2", "3"]
+    assert results[1].stats["search.dial.expanded"] > 0
+    assert (tmp_path / "profiles" / "day16.part_two.prof").exists()
+    assert not instrument.enabled
+
+
+def test_parallel(tmp_path):
+    (tmp_path / "input9.txt").write_text("2333133121414131402\n")
+    (tmp_path / "input11.txt").write_text("125 17\n")
+    serial = run_day(9, tmp_path, False) + run_day(11, tmp_path, False)
+    parallel = run_parallel([9, 11], tmp_path, False, workers=2)
+    assert [(r.day, r.phase, r.answer) for r in parallel] == [
+        (r.day, r.phase, r.answer) for r in serial
+    ]
+
+    cache = Cache(tmp_path / "cache")
+    run_parallel([11], tmp_path, False, cache, workers=2)
+    assert all(r.cached for r in run_parallel([11], tmp_path, False, cache))
+
+
+def test_priorities():
+    timings = {"4": {"load": 1.0, "part_one": 2.0, "part_two": 5.0}}
+    expected = priorities([4, 5], timings)
+    assert expected[4, "load"] == 6.0
+    assert expected[4, "part_two"] == 5.0
+    assert expected[5, "load"] == math.inf
+
+
+def test_discover():
+    days = discover()
+    assert 4 in days
+    assert 25 in days
+    assert 1 not in days
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 const std = @import("std");
+const Part = @import("lib.zig").Part;
 const days = .{
     @import("day01.zig"),
     @import("day02.zig"),
@@ -20,16 +21,61 @@ const days = .{
     @import("day19.zig"),
 };
 
-pub fn main() !void {
-    inline for (days, 1..) |day, nday| {
-        std.debug.print("Day {d}\n", .{nday});
-        inline for (.{ .one, .two }, 1..) |part, npart| {
-            const f = try std.fs.cwd().openFile(day.input, .{});
+const Job = struct {
+    answer: [64]u8 = undefined,
+    len: usize = 0,
+    err: ?anyerror = null,
+};
+
+fn runner(comptime day: type, comptime part: Part) fn (*Job) void {
+    return struct {
+        fn run(job: *Job) void {
+            const f = std.fs.cwd().openFile(day.input, .{}) catch |e| {
+                job.err = e;
+                return;
+            };
             defer f.close();
-            std.debug.print(
-                "  [{d} of 2]: {d}\n",
-                .{ npart, try day.solve(f.reader(), part) },
-            );
+            const answer = day.solve(f.reader(), part) catch |e| {
+                job.err = e;
+                return;
+            };
+            const s = std.fmt.bufPrint(&job.answer, "{d}", .{answer}) catch unreachable;
+            job.len = s.len;
+        }
+    }.run;
+}
+
+pub fn main() !void {
+    // with --parallel every (day, part) runs on its own thread
+    var parallel = false;
+    var args = std.process.args();
+    _ = args.skip();
+    while (args.next()) |arg| {
+        if (std.mem.eql(u8, arg, "--parallel")) parallel = true;
+    }
+
+    var jobs = [_]Job{.{}} ** (2 * days.len);
+    var threads = [_]?std.Thread{null} ** (2 * days.len);
+    inline for (days, 0..) |day, i| {
+        inline for (.{ Part.one, Part.two }, 0..) |part, j| {
+            const run = runner(day, part);
+            if (parallel) {
+                threads[2 * i + j] = try std.Thread.spawn(.{}, run, .{&jobs[2 * i + j]});
+            } else {
+                run(&jobs[2 * i + j]);
+            }
+        }
+    }
+    for (threads) |thread| {
+        if (thread) |t| t.join();
+    }
+
+    for (jobs, 0..) |*job, k| {
+        if (k % 2 == 0) std.debug.print("Day {d}\n", .{k / 2 + 1});
+        if (job.err) |e| {
+            std.debug.print("  [{d} of 2]: error: {s}\n", .{ k % 2 + 1, @errorName(e) });
+        } else {
+            std.debug.print("  [{d} of 2]: {s}\n", .{ k % 2 + 1, job.answer[0..job.len] });
         }
     }
 }
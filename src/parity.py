@@ -0,0 +1,236 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from generate import write
+from inputs import Input
+from main import input_path, load_day
+
+SRC = Path(__file__).parent
+ZIG_EXE = SRC.parent / "zig-out" / "bin" / "parity"
+# the days with both a dayNN.py and a dayNN.zig
+DAYS = (4, 5, 8, 9, 10, 11, 12, 13, 14, 15, 18, 19)
+PARTS = ("part_one", "part_two")
+
+# answers that a Zig day prints to stderr instead of returning
+ZIG_PRINTED = {(18, 2): re.compile(r"part 2: (\S+)")}
+
+
+@dataclass
+class Run:
+    answer: str | None
+    seconds: float | None
+    cpu: float
+    maxrss: int
+    error: str | None = None
+
+
+def build_zig(optimize="ReleaseFast"):
+    subprocess.run(
+        ["zig", "build", "parity", f"-Doptimize={optimize}"],
+        cwd=SRC.parent,
+        check=True,
+    )
+
+
+def spawn(cmd):
+    """
+    Run cmd and return its stdout and stderr along with its exit code, CPU
+    time and peak RSS in bytes, taken from the rusage of the child itself.
+    """
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+        out = proc.stdout.read()
+        proc.stdout.close()
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        err.seek(0)
+        stderr = err.read().decode(errors="replace")
+
+    cpu = usage.ru_utime + usage.ru_stime
+    # ru_maxrss is in KiB on Linux but in bytes on macOS
+    maxrss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return out.decode(), stderr, proc.returncode, cpu, maxrss
+
+
+def parse_run(stdout, stderr, code, cpu, maxrss):
+    if code != 0:
+        lines = stderr.strip().splitlines()
+        return Run(None, None, cpu, maxrss, lines[-1] if lines else f"exit {code}")
+    answer, ns = stdout.split()
+    return Run(answer, int(ns) / 1e9, cpu, maxrss)
+
+
+def run_zig(day, part, path, exe=ZIG_EXE):
+    stdout, stderr, code, cpu, maxrss = spawn([str(exe), str(day), str(part), path])
+    run = parse_run(stdout, stderr, code, cpu, maxrss)
+    if (day, part) in ZIG_PRINTED and run.error is None:
+        printed = ZIG_PRINTED[day, part].search(stderr)
+        run.answer = printed[1] if printed else run.answer
+    return run
+
+
+def run_python(day, part, path):
+    cmd = [sys.executable, __file__, "--worker", str(day), str(part), str(path)]
+    return parse_run(*spawn(cmd))
+
+
+def worker(day, part, path):
+    """
+    Load and solve one part in this process, timing the two together
+    since a Zig solve parses its input as well.
+    """
+    module = load_day(day)
+    start = time.perf_counter_ns()
+    with Input.open(path) as f:
+        data = module.load(f)
+    answer = getattr(module, PARTS[part - 1])(data)
+    elapsed = time.perf_counter_ns() - start
+    print(answer)
+    print(elapsed)
+
+
+def compare(day, path, exe=ZIG_EXE):
+    return [
+        (day, part, run_python(day, part, path), run_zig(day, part, path, exe))
+        for part in (1, 2)
+    ]
+
+
+def agree(py, zig):
+    return py.error is None and zig.error is None and py.answer == zig.answer
+
+
+def format_rows(rows):
+    header = (
+        "day",
+        "part",
+        "match",
+        "python (ms)",
+        "zig (ms)",
+        "py/zig",
+        "python rss",
+        "zig rss",
+        "answer",
+    )
+    table = [header]
+    for day, part, py, zig in rows:
+        match = "yes" if agree(py, zig) else "NO"
+        ratio = "-"
+        if py.seconds and zig.seconds:
+            ratio = f"{py.seconds / zig.seconds:.1f}x"
+        answer = py.answer if match == "yes" else f"{py.answer} != {zig.answer}"
+        if py.error or zig.error:
+            answer = f"python: {py.error or py.answer}, zig: {zig.error or zig.answer}"
+        table.append(
+            (
+                f"{day:02}",
+                str(part),
+                match,
+                "-" if py.seconds is None else f"{py.seconds * 1000:.2f}",
+                "-" if zig.seconds is None else f"{zig.seconds * 1000:.2f}",
+                ratio,
+                f"{py.maxrss / 2**20:.1f} MiB",
+                f"{zig.maxrss / 2**20:.1f} MiB",
+                answer,
+            )
+        )
+    widths = [max(len(row[i]) for row in table) for i in range(len(header) - 1)]
+    return "\n".join(
+        "  ".join(cell.rjust(w) for cell, w in zip(row, widths)) + "  " + row[-1]
+        for row in table
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that the Python and Zig days agree and compare them"
+    )
+    parser.add_argument("days", nargs="*", type=int, help=f"(default: {DAYS})")
+    parser.add_argument("--data-dir", help="read inputN.txt from this directory")
+    parser.add_argument(
+        "--size", type=int, help="generate inputs of this size instead of using data/"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--zig-exe", default=ZIG_EXE, help=f"(default: {ZIG_EXE})")
+    parser.add_argument(
+        "--build", action="store_true", help="build the Zig runner with ReleaseFast"
+    )
+    parser.add_argument("--worker", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        day, part, path = args.worker
+        worker(int(day), int(part), path)
+        return 0
+
+    days = args.days or DAYS
+    if args.build:
+        build_zig()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for day in days:
+            module = load_day(day)
+            if args.data_dir is None and args.size is None:
+                path = input_path(module)
+            elif args.size is None:
+                path = input_path(module, args.data_dir)
+            else:
+                path = input_path(module, tmp)
+                with open(path, "w") as f:
+                    write(day, f, args.size, args.seed)
+            rows += compare(day, str(path), args.zig_exe)
+
+    print(format_rows(rows))
+    return 0 if all(agree(py, zig) for _, _, py, zig in rows) else 1
+
+
+def test_run_python(tmp_path):
+    path = tmp_path / "input11.txt"
+    path.write_text("125 17\n")
+    run = run_python(11, 1, path)
+    assert run.answer == "55312"
+    assert run.seconds > 0 and run.maxrss > 0
+
+    run = run_python(11, 1, tmp_path / "missing.txt")
+    assert run.answer is None and "FileNotFoundError" in run.error
+
+
+def test_run_zig(tmp_path):
+    # stands in for the Zig runner, which prints day 18's second answer
+    exe = tmp_path / "parity"
+    exe.write_text("#!/bin/sh\necho 'part 2: 6,1' >&2\necho 0\necho 1500\n")
+    exe.chmod(0o755)
+    run = run_zig(18, 2, "input18.txt", exe)
+    assert run.answer == "6,1"
+    assert run.seconds == 1.5e-6
+
+
+@pytest.mark.skipif(not ZIG_EXE.exists(), reason="zig build parity hasn't been run")
+def test_parity(tmp_path):
+    path = tmp_path / "input11.txt"
+    path.write_text("125 17\n")
+    (_, _, py, zig), _ = compare(11, str(path))
+    assert py.answer == zig.answer
+
+
+def test_format_rows():
+    rows = [(4, 1, Run("18", 0.004, 0.0, 2**20), Run("18", 0.001, 0.0, 2**20))]
+    text = format_rows(rows)
+    assert "4.0x" in text and "yes" in text
+
+    rows = [(4, 2, Run("9", 0.1, 0.0, 0), Run(None, None, 0.0, 0, "error.Overflow"))]
+    assert "NO" in format_rows(rows)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+// Runs one part of one day on any input file, for src/parity.py:
+//
+//   parity <day> <part> <path>
+//
+// prints the answer and the nanoseconds spent in solve on two lines.
+const std = @import("std");
+const Part = @import("lib.zig").Part;
+
+const days = .{
+    .{ 4, @import("day04.zig") },
+    .{ 5, @import("day05.zig") },
+    .{ 8, @import("day08.zig") },
+    .{ 9, @import("day09.zig") },
+    .{ 10, @import("day10.zig") },
+    .{ 11, @import("day11.zig") },
+    .{ 12, @import("day12.zig") },
+    .{ 13, @import("day13.zig") },
+    .{ 14, @import("day14.zig") },
+    .{ 15, @import("day15.zig") },
+    .{ 18, @import("day18.zig") },
+    .{ 19, @import("day19.zig") },
+};
+
+pub fn main() !void {
+    const alloc = std.heap.page_allocator;
+    const args = try std.process.argsAlloc(alloc);
+    defer std.process.argsFree(alloc, args);
+    if (args.len != 4) {
+        std.debug.print("usage: {s} <day> <part> <path>\n", .{args[0]});
+        return error.BadArguments;
+    }
+
+    const day = try std.fmt.parseInt(u32, args[1], 10);
+    const part: Part = if (std.mem.eql(u8, args[2], "1")) .one else .two;
+
+    inline for (days) |entry| {
+        if (entry[0] == day) {
+            const f = try std.fs.cwd().openFile(args[3], .{});
+            defer f.close();
+            var buffered = std.io.bufferedReader(f.reader());
+
+            var timer = try std.time.Timer.start();
+            const answer = try entry[1].solve(buffered.reader(), part);
+            const elapsed = timer.read();
+
+            const stdout = std.io.getStdOut().writer();
+            try stdout.print("{d}\n{d}\n", .{ answer, elapsed });
+            return;
+        }
+    }
+    return error.UnknownDay;
+}
@@ -0,0 +1,323 @@
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+
+import pytest
+
+import instrument
+
+UNREACHED = -1
+
+
+class SearchResult:
+    """
+    The outcome of a search over nodes 0..n-1.
+
+    dist[u] is the distance from the nearest source to u, or UNREACHED,
+    and pred[u] is the node u was reached from (UNREACHED for sources).
+    If the search stopped early, goal is the node it stopped at and the
+    distances of nodes that were never expanded may be overestimates.
+    """
+
+    def __init__(self, dist, pred, goal=None):
+        self.dist = dist
+        self.pred = pred
+        self.goal = goal
+
+    def path(self, node=None):
+        """
+        Return the nodes from a source to node (the goal by default).
+        """
+        node = self.goal if node is None else node
+        if node is None or self.dist[node] == UNREACHED:
+            return []
+        path = []
+        while node != UNREACHED:
+            path.append(node)
+            node = self.pred[node]
+        path.reverse()
+        return path
+
+
+def _fields(n):
+    return array("q", [UNREACHED]) * n, array("q", [UNREACHED]) * n
+
+
+def _report(kind, expanded, pushes):
+    instrument.count(f"search.{kind}.expanded", expanded)
+    instrument.count(f"search.{kind}.pushes", pushes)
+
+
+def _goal_test(goal):
+    if goal is None:
+        return lambda u: False
+    if callable(goal):
+        return goal
+    return goal.__eq__
+
+
+def bfs(n, sources, neighbors, goal=None, limit=None):
+    """
+    Breadth first search for graphs where every edge costs 1.
+    neighbors(u) returns the nodes adjacent to u. The search stops at the
+    first node for which goal matches (a node id or a predicate), or once
+    every node within `limit` steps has been reached.
+    """
+    dist, pred = _fields(n)
+    is_goal = _goal_test(goal)
+    frontier = []
+    for s in sources:
+        if dist[s] == UNREACHED:
+            dist[s] = 0
+            frontier.append(s)
+
+    d = 0
+    expanded = pushes = 0
+    try:
+        while frontier:
+            for u in frontier:
+                if is_goal(u):
+                    return SearchResult(dist, pred, u)
+            if limit is not None and d >= limit:
+                break
+
+            d += 1
+            next_frontier = []
+            for u in frontier:
+                for v in neighbors(u):
+                    if dist[v] == UNREACHED:
+                        dist[v] = d
+                        pred[v] = u
+                        next_frontier.append(v)
+            expanded += len(frontier)
+            pushes += len(next_frontier)
+            frontier = next_frontier
+    finally:
+        _report("bfs", expanded, pushes)
+
+    return SearchResult(dist, pred)
+
+
+def zero_one_bfs(n, sources, edges, goal=None, limit=None):
+    """
+    Shortest paths where every edge costs 0 or 1. edges(u) returns
+    (v, weight) pairs.
+    """
+    dist, pred = _fields(n)
+    done = bytearray(n)
+    is_goal = _goal_test(goal)
+    queue = deque()
+    for s in sources:
+        dist[s] = 0
+        queue.append(s)
+
+    pushes = 0
+    try:
+        while queue:
+            u = queue.popleft()
+            if done[u]:
+                continue
+            done[u] = 1
+            du = dist[u]
+            if is_goal(u):
+                return SearchResult(dist, pred, u)
+            if limit is not None and du > limit:
+                break
+
+            for v, w in edges(u):
+                nd = du + w
+                if dist[v] == UNREACHED or nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    pushes += 1
+                    if w:
+                        queue.append(v)
+                    else:
+                        queue.appendleft(v)
+    finally:
+        if instrument.enabled:
+            _report("zero_one_bfs", done.count(1), pushes)
+
+    return SearchResult(dist, pred)
+
+
+def dial(n, sources, edges, max_weight, goal=None, limit=None):
+    """
+    Dijkstra's algorithm with a ring of max_weight + 1 buckets in place of
+    a heap, for small non-negative integer edge weights.
+    """
+    dist, pred = _fields(n)
+    done = bytearray(n)
+    is_goal = _goal_test(goal)
+    size = max_weight + 1
+    buckets = [[] for _ in range(size)]
+    pending = 0
+    for s in sources:
+        dist[s] = 0
+        buckets[0].append(s)
+        pending += 1
+
+    d = 0
+    pushes = 0
+    try:
+        while pending:
+            if limit is not None and d > limit:
+                break
+            bucket = buckets[d % size]
+            while bucket:
+                u = bucket.pop()
+                pending -= 1
+                if done[u] or dist[u] != d:
+                    continue
+                done[u] = 1
+                if is_goal(u):
+                    return SearchResult(dist, pred, u)
+                for v, w in edges(u):
+                    nd = d + w
+                    if dist[v] == UNREACHED or nd < dist[v]:
+                        dist[v] = nd
+                        pred[v] = u
+                        buckets[nd % size].append(v)
+                        pending += 1
+                        pushes += 1
+            d += 1
+    finally:
+        if instrument.enabled:
+            _report("dial", done.count(1), pushes)
+
+    return SearchResult(dist, pred)
+
+
+def dijkstra(n, sources, edges, goal=None, limit=None, heuristic=None):
+    """
+    Shortest paths for non-negative edge weights. With a consistent
+    heuristic (an estimate of the remaining distance that never
+    overestimates) this is A*.
+    """
+    dist, pred = _fields(n)
+    done = bytearray(n)
+    is_goal = _goal_test(goal)
+    h = heuristic or (lambda u: 0)
+    heap = []
+    for s in sources:
+        dist[s] = 0
+        heappush(heap, (h(s), s))
+
+    pushes = 0
+    try:
+        while heap:
+            _, u = heappop(heap)
+            if done[u]:
+                continue
+            done[u] = 1
+            du = dist[u]
+            if is_goal(u):
+                return SearchResult(dist, pred, u)
+            if limit is not None and du > limit:
+                break
+
+            for v, w in edges(u):
+                nd = du + w
+                if dist[v] == UNREACHED or nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heappush(heap, (nd + h(v), v))
+                    pushes += 1
+    finally:
+        if instrument.enabled:
+            _report("dijkstra", done.count(1), pushes)
+
+    return SearchResult(dist, pred)
+
+
+def grid_neighbors(grid, passable="."):
+    """
+    Return a neighbors function over the cells of a Grid that only steps
+    onto cells holding one of the `passable` characters.
+    """
+    cells = grid.cells
+    offsets = grid.offsets4
+    ok = bytes(passable, "ascii")
+
+    def neighbors(u):
+        return [u + o for o in offsets if cells[u + o] in ok]
+
+    return neighbors
+
+
+@pytest.fixture
+def weighted():
+    # 0 -1-> 1 -1-> 2 -1-> 3, plus a 5 weight shortcut from 0 to 3 and
+    # a free edge from 1 to 4
+    graph = {0: [(1, 1), (3, 5)], 1: [(2, 1), (4, 0)], 2: [(3, 1)], 3: [], 4: []}
+    return lambda u: graph[u]
+
+
+def test_bfs():
+    # a 2x3 grid of nodes numbered row by row
+    adjacent = {0: [1, 3], 1: [0, 2, 4], 2: [1, 5], 3: [0, 4], 4: [1, 3, 5], 5: [2, 4]}
+    result = bfs(6, [0], adjacent.__getitem__)
+    assert list(result.dist) == [0, 1, 2, 1, 2, 3]
+    assert result.path(5)[0] == 0 and len(result.path(5)) == 4
+
+    result = bfs(6, [0], adjacent.__getitem__, goal=4)
+    assert result.goal == 4
+    assert result.dist[5] == UNREACHED
+
+    result = bfs(6, [0, 5], adjacent.__getitem__)
+    assert list(result.dist) == [0, 1, 1, 1, 1, 0]
+
+    result = bfs(6, [0], adjacent.__getitem__, limit=1)
+    assert list(result.dist) == [0, 1, -1, 1, -1, -1]
+
+
+@pytest.mark.parametrize(
+    "search",
+    [
+        zero_one_bfs,
+        lambda *a, **kw: dial(*a, max_weight=5, **kw),
+        dijkstra,
+    ],
+)
+def test_weighted_searches(search, weighted):
+    if search is zero_one_bfs:
+        # 0-1 BFS can't take the 5 weight edge
+        graph = {0: [(1, 1)], 1: [(2, 1), (4, 0)], 2: [(3, 1)], 3: [], 4: []}
+        weighted = graph.__getitem__
+
+    result = search(5, [0], weighted)
+    assert list(result.dist) == [0, 1, 2, 3, 1]
+    assert result.path(3) == [0, 1, 2, 3]
+    assert result.path(4) == [0, 1, 4]
+
+    result = search(5, [0], weighted, goal=2)
+    assert result.goal == 2
+    assert result.path() == [0, 1, 2]
+
+
+def test_astar():
+    # a 1x10 corridor where the heuristic is the remaining distance
+    edges = lambda u: [(v, 1) for v in (u - 1, u + 1) if 0 <= v < 10]  # noqa: E731
+    result = dijkstra(10, [0], edges, goal=9, heuristic=lambda u: 9 - u)
+    assert result.dist[9] == 9
+    assert result.path() == list(range(10))
+
+
+def test_counters():
+    instrument.reset()
+    instrument.enable()
+    try:
+        edges = lambda u: [(v, 1) for v in (u - 1, u + 1) if 0 <= v < 10]  # noqa: E731
+        dijkstra(10, [0], edges, goal=4)
+        stats = instrument.snapshot()
+        assert stats["search.dijkstra.expanded"] == 5
+        assert stats["search.dijkstra.pushes"] == 4
+    finally:
+        instrument.enable(False)
+        instrument.reset()
+
+
+def test_unreachable():
+    result = dijkstra(3, [0], lambda u: [])
+    assert result.path(2) == []
+    assert list(result.dist) == [0, -1, -1]
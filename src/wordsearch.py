@@ -0,0 +1,199 @@
+from collections import Counter, deque
+
+import pytest
+
+from grid import Grid
+
+# the directions that lines are scanned in; the other four are found by
+# matching reversed words along the same lines
+DIRECTIONS = ("E", "S", "SE", "SW")
+OPPOSITE = {"E": "W", "S": "N", "SE": "NW", "SW": "NE"}
+
+
+class WordSearch:
+    """
+    Finds every occurrence of a set of words in a grid, in all 8
+    directions, with a single Aho-Corasick automaton.
+
+    Each row, column and diagonal is scanned once from one end. The
+    automaton holds every word both forwards and reversed, so a reversed
+    word matching along a line is the word running in the opposite
+    direction. The transitions are a flat table over the letters that
+    appear in the words (every other byte maps to 0), so a scan is one
+    list lookup per cell no matter how many words there are.
+    """
+
+    def __init__(self, words):
+        self.words = list(dict.fromkeys(words))
+        letters = sorted({ch for word in self.words for ch in word.encode()})
+        self.width = len(letters) + 1
+        self.table = bytes(
+            letters.index(b) + 1 if b in letters else 0 for b in range(256)
+        )
+
+        # the trie, with outputs as (word index, length, reversed)
+        children = [{}]
+        outputs = [[]]
+        for w, word in enumerate(self.words):
+            for backwards, text in ((False, word), (True, word[::-1])):
+                node = 0
+                for ch in text.encode().translate(self.table):
+                    if ch not in children[node]:
+                        children[node][ch] = len(children)
+                        children.append({})
+                        outputs.append([])
+                    node = children[node][ch]
+                outputs[node].append((w, len(word), backwards))
+
+        # breadth first, filling in every transition and merging the
+        # outputs of each node's longest proper suffix into its own
+        width = self.width
+        delta = [0] * (len(children) * width)
+        fail = [0] * len(children)
+        queue = deque()
+        for ch, child in children[0].items():
+            delta[ch] = child
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            outputs[node] += outputs[fail[node]]
+            for ch in range(width):
+                child = children[node].get(ch)
+                if child is None:
+                    delta[node * width + ch] = delta[fail[node] * width + ch]
+                else:
+                    fail[child] = delta[fail[node] * width + ch]
+                    delta[node * width + ch] = child
+                    queue.append(child)
+        self.delta = delta
+        self.outputs = [tuple(out) for out in outputs]
+
+    def scan(self, line):
+        """
+        Yield (end, outputs) for every position of a bytes line at which
+        at least one word (or reversed word) ends.
+        """
+        delta, outputs, width = self.delta, self.outputs, self.width
+        state = 0
+        for i, ch in enumerate(line.translate(self.table)):
+            state = delta[state * width + ch]
+            if outputs[state]:
+                yield i, outputs[state]
+
+    def count(self, grid):
+        """
+        Return a Counter of how many times each word occurs.
+        """
+        # count the visits to each state and only expand them into words
+        # at the end, since a state can end many words
+        delta, width = self.delta, self.width
+        visits = [0] * len(self.outputs)
+        for _, _, line in lines(grid):
+            state = 0
+            for ch in line.translate(self.table):
+                state = delta[state * width + ch]
+                visits[state] += 1
+
+        counts = Counter()
+        for state, n in enumerate(visits):
+            if n:
+                for w, _, _ in self.outputs[state]:
+                    counts[self.words[w]] += n
+        return counts
+
+    def find(self, grid):
+        """
+        Yield (word, (row, col), direction) for every occurrence, where
+        (row, col) is the first letter and direction is a compass point.
+        """
+        for direction, cells, line in lines(grid):
+            for end, found in self.scan(line):
+                for w, length, backwards in found:
+                    if backwards:
+                        start, heading = cells[end], OPPOSITE[direction]
+                    else:
+                        start, heading = cells[end - length + 1], direction
+                    yield self.words[w], grid.coords(start), heading
+
+
+def lines(grid):
+    """
+    Yield (direction, indices, bytes) for every row, column and diagonal
+    of the grid, running east, south, south east and south west.
+    """
+    s = grid.stride
+    steps = {"E": 1, "S": s, "SE": s + 1, "SW": s - 1}
+    starts = {
+        "E": [(r, 0) for r in range(grid.rows)],
+        "S": [(0, c) for c in range(grid.cols)],
+        "SE": [(0, c) for c in range(grid.cols)]
+        + [(r, 0) for r in range(1, grid.rows)],
+        "SW": [(0, c) for c in range(grid.cols)]
+        + [(r, grid.cols - 1) for r in range(1, grid.rows)],
+    }
+    lengths = {
+        "E": lambda r, c: grid.cols,
+        "S": lambda r, c: grid.rows,
+        "SE": lambda r, c: min(grid.rows - r, grid.cols - c),
+        "SW": lambda r, c: min(grid.rows - r, c + 1),
+    }
+    for direction in DIRECTIONS:
+        step = steps[direction]
+        for r, c in starts[direction]:
+            first = grid.index(r, c)
+            cells = range(first, first + step * lengths[direction](r, c), step)
+            yield direction, cells, bytes(grid.cells[cells.start : cells.stop : step])
+
+
+EXAMPLE = """MMMSXXMASM
+MSAMXMSMSA
+AMXSXMAAMM
+MSAMASMSMX
+XMASAMXAMM
+XXAMMXXAMA
+SMSMSASXSS
+SAXAMASAAA
+MAMMMXMMMM
+MXMXAXMASX"""
+
+
+def test_xmas():
+    grid = Grid.from_lines(EXAMPLE.split("\n"))
+    assert WordSearch(["XMAS"]).count(grid)["XMAS"] == 18
+
+
+def test_find():
+    grid = Grid.from_lines(["CAT", "AXA", "TAC"])
+    assert set(WordSearch(["CAT", "XA"]).find(grid)) == {
+        ("CAT", (0, 0), "E"),
+        ("CAT", (0, 0), "S"),
+        ("CAT", (2, 2), "W"),
+        ("CAT", (2, 2), "N"),
+        ("XA", (1, 1), "N"),
+        ("XA", (1, 1), "E"),
+        ("XA", (1, 1), "S"),
+        ("XA", (1, 1), "W"),
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_brute_force(seed):
+    import random
+
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 12), rng.randint(1, 12)
+    grid = Grid.from_lines(
+        ["".join(rng.choice("ABC") for _ in range(cols)) for _ in range(rows)]
+    )
+    words = [
+        "".join(rng.choice("ABC") for _ in range(rng.randint(1, 4))) for _ in range(20)
+    ]
+
+    expected = Counter()
+    for word in set(words):
+        for i in grid.indices():
+            for o in grid.offsets8:
+                if all(grid[i + k * o] == ord(ch) for k, ch in enumerate(word)):
+                    expected[word] += 1
+    counts = WordSearch(words).count(grid)
+    assert {w: counts[w] for w in set(words)} == {w: expected[w] for w in set(words)}